@@ -2,6 +2,7 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from sqlalchemy import event
 from config import config
 
 db = SQLAlchemy()
@@ -57,6 +58,16 @@ def create_app(config_name='development'):
     
     # Create database tables
     with app.app_context():
+        # Test databases are throwaway; don't pay for journaling or syncs
+        if app.config.get('TESTING') and db.engine.dialect.name == 'sqlite':
+            @event.listens_for(db.engine, 'connect')
+            def tune_sqlite(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute('PRAGMA journal_mode=MEMORY')
+                cursor.execute('PRAGMA synchronous=OFF')
+                cursor.execute('PRAGMA temp_store=MEMORY')
+                cursor.close()
+        
         db.create_all()
     
     return app
@@ -1,6 +1,7 @@
 from datetime import datetime
+from sqlalchemy import update
 from app.models import (
-    Account, User, AccountStatus, AccountType, AuditAction, db
+    Account, User, AccountStatus, AccountType, AuditAction, db, to_money
 )
 from app.security import generate_account_number, log_audit
 
@@ -40,6 +41,7 @@ class AccountService:
             raise ValueError(f"Invalid account type: {account_type}")
         
         # Validate opening balance
+        opening_balance = to_money(opening_balance)
         if opening_balance < 0:
             raise ValueError("Opening balance cannot be negative")
         
@@ -77,7 +79,7 @@ class AccountService:
                 'account_id': account.id,
                 'account_number': account.account_number,
                 'account_type': account.account_type.value,
-                'balance': account.balance,
+                'balance': float(account.balance),
                 'status': account.status.value,
                 'created_at': account.created_at.isoformat()
             }
@@ -85,6 +87,105 @@ class AccountService:
             db.session.rollback()
             raise ValueError(f"Failed to create account: {str(e)}")
     
+    @staticmethod
+    def bulk_create_accounts(user_id: int, specs: list) -> list:
+        """
+        Create several accounts for a user with a single commit.
+        
+        Args:
+            user_id: ID of the account owner
+            specs: List of dicts with 'account_type' and optional 'opening_balance'
+            
+        Returns:
+            List of account dictionaries, in the same order as specs
+            
+        Raises:
+            ValueError: If validation fails
+        """
+        # Validate user exists
+        user = User.query.get(user_id)
+        if not user:
+            raise ValueError("User not found")
+        
+        if not specs:
+            return []
+        
+        # Check account limit (max 20 accounts per user)
+        existing_accounts_count = Account.query.filter_by(user_id=user_id).count()
+        if existing_accounts_count + len(specs) > 20:
+            raise ValueError("Account limit reached. Maximum 20 accounts per user.")
+        
+        # Validate every spec before writing anything
+        validated = []
+        for spec in specs:
+            account_type = spec.get('account_type', '')
+            try:
+                acc_type = AccountType[account_type.upper()]
+            except KeyError:
+                raise ValueError(f"Invalid account type: {account_type}")
+            
+            opening_balance = to_money(spec.get('opening_balance', 0.0))
+            if opening_balance < 0:
+                raise ValueError("Opening balance cannot be negative")
+            
+            validated.append((acc_type, opening_balance))
+        
+        try:
+            # Generate unique account numbers, checking the whole batch per query
+            account_numbers = set()
+            while len(account_numbers) < len(validated):
+                candidates = {
+                    generate_account_number()
+                    for _ in range(len(validated) - len(account_numbers))
+                } - account_numbers
+                taken = {
+                    row.account_number
+                    for row in Account.query.with_entities(Account.account_number)
+                    .filter(Account.account_number.in_(candidates))
+                }
+                account_numbers |= candidates - taken
+            
+            now = datetime.utcnow()
+            accounts = [
+                Account(
+                    account_number=account_number,
+                    user_id=user_id,
+                    account_type=acc_type,
+                    balance=opening_balance,
+                    opening_balance=opening_balance,
+                    status=AccountStatus.ACTIVE,
+                    created_at=now,
+                    updated_at=now
+                )
+                for account_number, (acc_type, opening_balance) in zip(account_numbers, validated)
+            ]
+            
+            db.session.bulk_save_objects(accounts, return_defaults=True)
+            db.session.commit()
+            
+            log_audit(
+                user_id=user_id,
+                action=AuditAction.ADMIN_ACTION,
+                resource_type='account',
+                details=f'Accounts created: {", ".join(a.account_number for a in accounts)}'
+            )
+            
+            return [
+                {
+                    'success': True,
+                    'account_id': account.id,
+                    'account_number': account.account_number,
+                    'account_type': account.account_type.value,
+                    'balance': float(account.balance),
+                    'status': account.status.value,
+                    'created_at': account.created_at.isoformat()
+                }
+                for account in accounts
+            ]
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f"Failed to create accounts: {str(e)}")
+    
     @staticmethod
     def get_account(account_id: int) -> dict:
         """
@@ -109,9 +210,9 @@ class AccountService:
             'account_number': account.account_number,
             'user_id': account.user_id,
             'account_type': account.account_type.value,
-            'balance': account.balance,
+            'balance': float(account.balance),
             'status': account.status.value,
-            'opening_balance': account.opening_balance,
+            'opening_balance': float(account.opening_balance),
             'created_at': account.created_at.isoformat(),
             'updated_at': account.updated_at.isoformat()
         }
@@ -135,8 +236,8 @@ class AccountService:
                 'account_number': account.account_number,
                 'user_id': account.user_id,
                 'account_type': account.account_type.value,
-                'balance': account.balance,
-                'opening_balance': account.opening_balance,
+                'balance': float(account.balance),
+                'opening_balance': float(account.opening_balance),
                 'status': account.status.value,
                 'created_at': account.created_at.isoformat()
             }
@@ -167,8 +268,15 @@ class AccountService:
             raise ValueError("Account is already frozen")
         
         try:
-            account.status = AccountStatus.FROZEN
-            account.updated_at = datetime.utcnow()
+            # Change the status only if no one else changed it since the check
+            changed = db.session.execute(
+                update(Account)
+                .where(Account.id == account_id, Account.status != AccountStatus.FROZEN)
+                .values(status=AccountStatus.FROZEN, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if changed != 1:
+                raise ValueError("Account is already frozen")
             db.session.commit()
             
             log_audit(
@@ -213,8 +321,15 @@ class AccountService:
             raise ValueError("Account is not frozen")
         
         try:
-            account.status = AccountStatus.ACTIVE
-            account.updated_at = datetime.utcnow()
+            # Change the status only if no one else changed it since the check
+            changed = db.session.execute(
+                update(Account)
+                .where(Account.id == account_id, Account.status == AccountStatus.FROZEN)
+                .values(status=AccountStatus.ACTIVE, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if changed != 1:
+                raise ValueError("Account is not frozen")
             db.session.commit()
             
             log_audit(
@@ -257,7 +372,7 @@ class AccountService:
         return {
             'account_id': account.id,
             'account_number': account.account_number,
-            'balance': account.balance,
+            'balance': float(account.balance),
             'status': account.status.value
         }
     
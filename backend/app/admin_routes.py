@@ -335,6 +335,7 @@ def get_users_by_role(role):
         offset = request.args.get('offset', 0, type=int)
         
         result = RBACService.get_users_by_role(role, limit, offset)
+        result.pop('users_by_id')  # Same users as the list; don't send them twice
         return jsonify(result), 200
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
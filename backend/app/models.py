@@ -1,8 +1,46 @@
 from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
 from enum import Enum
 import uuid
 from app import db
 
+# Monetary columns are NUMERIC(18, 2); values are rounded to whole cents
+CENT = Decimal('0.01')
+# NUMERIC(18, 2) leaves 16 digits before the decimal point
+MAX_MONEY = Decimal(10) ** 16
+
+def to_money(value) -> Decimal:
+    """
+    Convert a numeric value to a Decimal rounded to whole cents.
+    
+    Args:
+        value: int, float, str or Decimal amount
+        
+    Returns:
+        Decimal quantized to two places
+        
+    Raises:
+        ValueError: If the value is not a finite number or has more than
+            16 integer digits
+    """
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f"Invalid amount: {value}")
+    
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value}")
+    
+    try:
+        amount = amount.quantize(CENT, rounding=ROUND_HALF_EVEN)
+    except InvalidOperation:
+        raise ValueError(f"Amount out of range: {value}")
+    
+    if abs(amount) >= MAX_MONEY:
+        raise ValueError(f"Amount out of range: {value}")
+    
+    return amount
+
 class UserRole(Enum):
     """User roles in the system."""
     CUSTOMER = "customer"
@@ -79,9 +117,9 @@ class Account(db.Model):
     account_number = db.Column(db.String(20), unique=True, nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     account_type = db.Column(db.Enum(AccountType), nullable=False)
-    balance = db.Column(db.Float, default=0.0, nullable=False)
+    balance = db.Column(db.Numeric(18, 2), default=Decimal('0.00'), nullable=False)
     status = db.Column(db.Enum(AccountStatus), default=AccountStatus.ACTIVE, nullable=False)
-    opening_balance = db.Column(db.Float, default=0.0, nullable=False)
+    opening_balance = db.Column(db.Numeric(18, 2), default=Decimal('0.00'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
@@ -101,7 +139,7 @@ class Transaction(db.Model):
     sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     sender_account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
     receiver_account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.Numeric(18, 2), nullable=False)
     transaction_type = db.Column(db.Enum(TransactionType), nullable=False)
     description = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -95,10 +95,22 @@ class RBACService:
         if not user:
             return False
         
-        if user.role not in RBACService.PERMISSIONS:
-            return False
+        return permission in _PERMISSIONS_BY_ROLE.get(user.role, _NO_PERMISSIONS)
+    
+    @staticmethod
+    def has_permissions(user: User, permissions) -> dict:
+        """
+        Check several permissions for a user at once.
         
-        return RBACService.PERMISSIONS[user.role].get(permission, False)
+        Args:
+            user: User object
+            permissions: Iterable of permission names to check
+            
+        Returns:
+            Dictionary mapping each permission name to True/False
+        """
+        granted = _PERMISSIONS_BY_ROLE.get(user.role, _NO_PERMISSIONS) if user else _NO_PERMISSIONS
+        return {permission: permission in granted for permission in permissions}
     
     @staticmethod
     def check_permission(user_id: int, permission: str) -> bool:
@@ -138,7 +150,7 @@ class RBACService:
             'user_id': user_id,
             'username': user.username,
             'role': user.role.value,
-            'permissions': RBACService.PERMISSIONS.get(user.role, {})
+            'permissions': _permission_flags(user.role)
         }
     
     @staticmethod
@@ -203,7 +215,8 @@ class RBACService:
             offset: Number of users to skip
             
         Returns:
-            Dictionary with users and metadata
+            Dictionary with users and metadata; 'users_by_id' indexes the
+            same user dicts by id
             
         Raises:
             ValueError: If invalid role
@@ -216,21 +229,24 @@ class RBACService:
         users = User.query.filter_by(role=user_role).limit(limit).offset(offset).all()
         total_count = User.query.filter_by(role=user_role).count()
         
+        user_list = [
+            {
+                'id': u.id,
+                'user_id': u.id,  # Keep for backward compatibility
+                'username': u.username,
+                'email': u.email,
+                'full_name': u.full_name,
+                'role': u.role.value,
+                'is_active': u.is_active,
+                'created_at': u.created_at.isoformat()
+            }
+            for u in users
+        ]
+        
         return {
             'role': role,
-            'users': [
-                {
-                    'id': u.id,
-                    'user_id': u.id,  # Keep for backward compatibility
-                    'username': u.username,
-                    'email': u.email,
-                    'full_name': u.full_name,
-                    'role': u.role.value,
-                    'is_active': u.is_active,
-                    'created_at': u.created_at.isoformat()
-                }
-                for u in users
-            ],
+            'users': user_list,
+            'users_by_id': {u['id']: u for u in user_list},
             'total_count': total_count,
             'limit': limit,
             'offset': offset
@@ -319,3 +335,19 @@ class RBACService:
         except Exception as e:
             db.session.rollback()
             raise ValueError(f"Failed to activate user: {str(e)}")
+
+
+# Granted permissions per role, precomputed once from the matrix above
+_PERMISSIONS_BY_ROLE = {
+    role: frozenset(name for name, granted in permissions.items() if granted)
+    for role, permissions in RBACService.PERMISSIONS.items()
+}
+_ALL_PERMISSIONS = tuple(RBACService.PERMISSIONS[UserRole.CUSTOMER])
+_NO_PERMISSIONS = frozenset()
+
+def _permission_flags(role: UserRole) -> dict:
+    """Build a fresh permission-name -> granted mapping for a role."""
+    if role not in _PERMISSIONS_BY_ROLE:
+        return {}
+    granted = _PERMISSIONS_BY_ROLE[role]
+    return {name: name in granted for name in _ALL_PERMISSIONS}
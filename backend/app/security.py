@@ -1,9 +1,9 @@
 import bcrypt
-import random
-import string
+import re
+import secrets
 from datetime import datetime, timedelta
-from functools import wraps
-from flask import request, jsonify, current_app
+from functools import wraps, lru_cache
+from flask import request, jsonify, current_app, has_app_context
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 import hmac, hashlib
 from app.models import User, UserRole, AuditLog, AuditAction, db
@@ -12,6 +12,8 @@ def hash_password(password: str) -> str:
     """
     Hash a password using bcrypt.
     
+    The cost factor is read from the BCRYPT_LOG_ROUNDS config value (default 12).
+    
     Args:
         password: Plain text password
         
@@ -21,13 +23,22 @@ def hash_password(password: str) -> str:
     if not password or len(password) < 8:
         raise ValueError("Password must be at least 8 characters long")
     
-    salt = bcrypt.gensalt(rounds=12)
+    rounds = current_app.config.get('BCRYPT_LOG_ROUNDS', 12) if has_app_context() else 12
+    salt = bcrypt.gensalt(rounds=rounds)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+@lru_cache(maxsize=256)
+def _checkpw_cached(password: str, password_hash: str) -> bool:
+    """Memoized bcrypt.checkpw; only used when the app runs in TESTING mode."""
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
 def verify_password(password: str, password_hash: str) -> bool:
     """
     Verify a password against its hash.
     
+    Under the TESTING config, results are memoized per (password, hash) pair,
+    since the suite verifies the same few passwords over and over.
+    
     Args:
         password: Plain text password to verify
         password_hash: Hashed password to compare against
@@ -36,6 +47,8 @@ def verify_password(password: str, password_hash: str) -> bool:
         True if password matches, False otherwise
     """
     try:
+        if has_app_context() and current_app.config.get('TESTING'):
+            return _checkpw_cached(password, password_hash)
         return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
     except Exception:
         return False
@@ -47,8 +60,17 @@ def generate_account_number() -> str:
     Returns:
         Account number string (format: ACC-XXXXXXXXXX)
     """
-    random_part = ''.join(random.choices(string.digits, k=10))
-    return f"ACC-{random_part}"
+    return f"ACC-{secrets.randbelow(10**10):010d}"
+
+# Substrings stripped by sanitize_input, in removal order: dangerous characters
+# and patterns first, then each SQL keyword in upper, lower and capitalized form
+_DANGEROUS_CHARS = ('<', '>', '"', "'", ';', '--', '/*', '*/', 'xp_', 'sp_')
+_SQL_KEYWORDS = ('DROP', 'DELETE', 'TRUNCATE', 'ALTER', 'EXEC', 'EXECUTE')
+_SANITIZE_TOKENS = _DANGEROUS_CHARS + tuple(
+    variant
+    for keyword in _SQL_KEYWORDS
+    for variant in (keyword, keyword.lower(), keyword.capitalize())
+)
 
 def sanitize_input(data: str, max_length: int = 255) -> str:
     """
@@ -64,25 +86,18 @@ def sanitize_input(data: str, max_length: int = 255) -> str:
     if not isinstance(data, str):
         raise ValueError("Input must be a string")
     
-    # Remove potentially dangerous characters and patterns
-    dangerous_chars = ['<', '>', '"', "'", ';', '--', '/*', '*/', 'xp_', 'sp_']
-    sql_keywords = ['DROP', 'DELETE', 'TRUNCATE', 'ALTER', 'EXEC', 'EXECUTE']
-    
+    # Remove dangerous characters, then SQL keywords
     sanitized = data
-    
-    # Remove dangerous characters
-    for char in dangerous_chars:
-        sanitized = sanitized.replace(char, '')
-    
-    # Remove SQL keywords (case-insensitive)
-    for keyword in sql_keywords:
-        sanitized = sanitized.replace(keyword, '')
-        sanitized = sanitized.replace(keyword.lower(), '')
-        sanitized = sanitized.replace(keyword.capitalize(), '')
+    for token in _SANITIZE_TOKENS:
+        sanitized = sanitized.replace(token, '')
     
     # Trim to max length
     return sanitized[:max_length].strip()
 
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Accept phone numbers with 7-20 digits, no spaces allowed
+_PHONE_RE = re.compile(r'^\+?[\d\-()]{7,20}$')
+
 def validate_email(email: str) -> bool:
     """
     Validate email format.
@@ -93,9 +108,7 @@ def validate_email(email: str) -> bool:
     Returns:
         True if valid email format, False otherwise
     """
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return _EMAIL_RE.match(email) is not None
 
 def validate_phone(phone: str) -> bool:
     """
@@ -107,10 +120,7 @@ def validate_phone(phone: str) -> bool:
     Returns:
         True if valid phone format, False otherwise
     """
-    import re
-    # Accept phone numbers with 7-20 digits, no spaces allowed
-    pattern = r'^\+?[\d\-()]{7,20}$'
-    return re.match(pattern, phone) is not None
+    return _PHONE_RE.match(phone) is not None
 
 def log_audit(user_id: int = None, action: AuditAction = None, 
               resource_type: str = None, resource_id: str = None, 
@@ -1,6 +1,9 @@
+import uuid
 from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import insert, update
 from app.models import (
-    Transaction, Account, User, AccountStatus, TransactionType, AuditAction, db
+    Transaction, Account, User, AccountStatus, TransactionType, AuditAction, db, to_money
 )
 from app.security import log_audit
 
@@ -8,29 +11,33 @@ class TransactionService:
     """Service for handling financial transactions."""
     
     @staticmethod
-    def internal_transfer(sender_user_id: int, sender_account_id: int, 
-                         receiver_account_id: int, amount: float, 
-                         description: str = None) -> dict:
+    def _validate_internal_transfer(sender_user_id: int, sender_account_id: int,
+                                    receiver_account_id: int, amounts: list) -> tuple:
         """
-        Transfer money between accounts of the same user.
+        Check a batch of transfers between two accounts of the same user.
+        
+        Shared by internal_transfer and bulk_internal_transfer so both apply
+        the same amount, ownership, status and balance rules.
         
         Args:
-            sender_user_id: ID of the user performing the transfer
+            sender_user_id: ID of the user performing the transfers
             sender_account_id: ID of the sender's account
             receiver_account_id: ID of the receiver's account
-            amount: Amount to transfer
-            description: Optional description of the transfer
+            amounts: Amounts to transfer
             
         Returns:
-            Dictionary with transaction data
+            Tuple of (sender_account, receiver_account, amounts as Decimals)
             
         Raises:
             ValueError: If validation fails
         """
-        # Validate amount
-        if amount <= 0:
+        # Validate amounts
+        amounts = [to_money(amount) for amount in amounts]
+        if not amounts or any(amount <= 0 for amount in amounts):
             raise ValueError("Transfer amount must be positive")
         
+        total = sum(amounts, Decimal('0.00'))
+        
         # Get accounts
         sender_account = Account.query.get(sender_account_id)
         receiver_account = Account.query.get(receiver_account_id)
@@ -55,20 +62,88 @@ class TransactionService:
         if receiver_account.status != AccountStatus.ACTIVE:
             raise ValueError("Receiver account is not active")
         
-        # Check balance
-        if sender_account.balance < amount:
+        # Check balance covers the whole batch
+        if sender_account.balance < total:
             log_audit(
                 user_id=sender_user_id,
                 action=AuditAction.SUSPICIOUS_ACTIVITY,
                 resource_type='transaction',
-                details=f'Insufficient balance for transfer: {amount}'
+                details=f'Insufficient balance for transfer: {total}'
+            )
+            raise ValueError("Insufficient balance")
+        
+        return sender_account, receiver_account, amounts
+    
+    @staticmethod
+    def _move_funds(sender_account_id: int, receiver_account_id: int,
+                    amount: Decimal, now: datetime = None) -> None:
+        """
+        Debit the sender and credit the receiver inside the current transaction.
+        
+        The balances are adjusted in SQL rather than from the loaded accounts,
+        and the debit only applies while the sender is active and still
+        covers the amount, so concurrent transfers can't overdraw the account
+        or overwrite each other's balance.
+        
+        Args:
+            sender_account_id: ID of the account to debit
+            receiver_account_id: ID of the account to credit
+            amount: Amount to move
+            now: Timestamp for updated_at; defaults to the current time
+            
+        Raises:
+            ValueError: If the sender no longer covers the amount
+        """
+        now = now or datetime.utcnow()
+        
+        debited = db.session.execute(
+            update(Account)
+            .where(
+                Account.id == sender_account_id,
+                Account.status == AccountStatus.ACTIVE,
+                Account.balance >= amount
             )
+            .values(balance=Account.balance - amount, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if debited.rowcount != 1:
             raise ValueError("Insufficient balance")
         
+        db.session.execute(
+            update(Account)
+            .where(Account.id == receiver_account_id)
+            .values(balance=Account.balance + amount, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    def internal_transfer(sender_user_id: int, sender_account_id: int, 
+                         receiver_account_id: int, amount: float, 
+                         description: str = None) -> dict:
+        """
+        Transfer money between accounts of the same user.
+        
+        Args:
+            sender_user_id: ID of the user performing the transfer
+            sender_account_id: ID of the sender's account
+            receiver_account_id: ID of the receiver's account
+            amount: Amount to transfer
+            description: Optional description of the transfer
+            
+        Returns:
+            Dictionary with transaction data
+            
+        Raises:
+            ValueError: If validation fails
+        """
+        sender_account, receiver_account, amounts = TransactionService._validate_internal_transfer(
+            sender_user_id, sender_account_id, receiver_account_id, [amount]
+        )
+        amount = amounts[0]
+        
         try:
             # Perform transfer
-            sender_account.balance -= amount
-            receiver_account.balance += amount
+            TransactionService._move_funds(sender_account_id, receiver_account_id, amount)
             
             # Create DEBIT transaction record for sender
             debit_transaction = Transaction(
@@ -92,8 +167,6 @@ class TransactionService:
             
             db.session.add(debit_transaction)
             db.session.add(credit_transaction)
-            sender_account.updated_at = datetime.utcnow()
-            receiver_account.updated_at = datetime.utcnow()
             db.session.commit()
             
             log_audit(
@@ -109,13 +182,86 @@ class TransactionService:
                 'transaction_id': debit_transaction.transaction_id,
                 'sender_account': sender_account.account_number,
                 'receiver_account': receiver_account.account_number,
-                'amount': amount,
+                'amount': float(amount),
                 'created_at': debit_transaction.created_at.isoformat()
             }
         except Exception as e:
             db.session.rollback()
             raise ValueError(f"Transfer failed: {str(e)}")
     
+    @staticmethod
+    def bulk_internal_transfer(sender_user_id: int, sender_account_id: int,
+                               receiver_account_id: int, amounts: list,
+                               description: str = None) -> dict:
+        """
+        Perform several transfers between accounts of the same user in one commit.
+        
+        Balances are updated once for the total and all DEBIT/CREDIT records
+        are written with a single multi-row INSERT.
+        
+        Args:
+            sender_user_id: ID of the user performing the transfers
+            sender_account_id: ID of the sender's account
+            receiver_account_id: ID of the receiver's account
+            amounts: Amounts to transfer, one transfer per entry
+            description: Optional description applied to every transfer
+            
+        Returns:
+            Dictionary with the transaction IDs and total amount
+            
+        Raises:
+            ValueError: If validation fails
+        """
+        sender_account, receiver_account, amounts = TransactionService._validate_internal_transfer(
+            sender_user_id, sender_account_id, receiver_account_id, amounts
+        )
+        total = sum(amounts, Decimal('0.00'))
+        
+        try:
+            # Perform transfers
+            now = datetime.utcnow()
+            TransactionService._move_funds(sender_account_id, receiver_account_id, total, now)
+            
+            debit_ids = [str(uuid.uuid4()) for _ in amounts]
+            record = {
+                'sender_id': sender_user_id,
+                'sender_account_id': sender_account_id,
+                'receiver_account_id': receiver_account_id,
+                'description': description or 'Internal transfer',
+                'created_at': now
+            }
+            
+            # DEBIT record for the sender and CREDIT record for the receiver, per transfer
+            rows = []
+            for transaction_id, amount in zip(debit_ids, amounts):
+                rows.append({**record, 'transaction_id': transaction_id, 'amount': amount,
+                             'transaction_type': TransactionType.DEBIT})
+                rows.append({**record, 'transaction_id': str(uuid.uuid4()), 'amount': amount,
+                             'transaction_type': TransactionType.CREDIT})
+            
+            db.session.execute(insert(Transaction), rows)
+            db.session.commit()
+            
+            log_audit(
+                user_id=sender_user_id,
+                action=AuditAction.TRANSFER,
+                resource_type='transaction',
+                details=f'Internal transfers: {len(amounts)} totalling {total} from {sender_account.account_number} to {receiver_account.account_number}'
+            )
+            
+            return {
+                'success': True,
+                'transaction_ids': debit_ids,
+                'sender_account': sender_account.account_number,
+                'receiver_account': receiver_account.account_number,
+                'count': len(amounts),
+                'total_amount': float(total),
+                'created_at': now.isoformat()
+            }
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f"Transfer failed: {str(e)}")
+    
     @staticmethod
     def external_transfer(sender_user_id: int, sender_account_id: int, 
                          receiver_account_number: str, amount: float, 
@@ -137,6 +283,7 @@ class TransactionService:
             ValueError: If validation fails
         """
         # Validate amount
+        amount = to_money(amount)
         if amount <= 0:
             raise ValueError("Transfer amount must be positive")
         
@@ -188,8 +335,7 @@ class TransactionService:
         
         try:
             # Perform transfer
-            sender_account.balance -= amount
-            receiver_account.balance += amount
+            TransactionService._move_funds(sender_account_id, receiver_account.id, amount)
             
             # Create DEBIT transaction record for sender
             debit_transaction = Transaction(
@@ -213,8 +359,6 @@ class TransactionService:
             
             db.session.add(debit_transaction)
             db.session.add(credit_transaction)
-            sender_account.updated_at = datetime.utcnow()
-            receiver_account.updated_at = datetime.utcnow()
             db.session.commit()
             
             log_audit(
@@ -230,7 +374,7 @@ class TransactionService:
                 'transaction_id': debit_transaction.transaction_id,
                 'sender_account': sender_account.account_number,
                 'receiver_account': receiver_account.account_number,
-                'amount': amount,
+                'amount': float(amount),
                 'created_at': debit_transaction.created_at.isoformat()
             }
         except Exception as e:
@@ -260,7 +404,7 @@ class TransactionService:
             'transaction_id': transaction.transaction_id,
             'sender_account': transaction.sender_account.account_number,
             'receiver_account': transaction.receiver_account.account_number,
-            'amount': transaction.amount,
+            'amount': float(transaction.amount),
             'transaction_type': transaction.transaction_type.value,
             'description': transaction.description,
             'created_at': transaction.created_at.isoformat()
@@ -292,7 +436,7 @@ class TransactionService:
         transactions = Transaction.query.filter(
             ((Transaction.sender_account_id == account_id) & (Transaction.transaction_type == TransactionType.DEBIT)) |
             ((Transaction.receiver_account_id == account_id) & (Transaction.transaction_type == TransactionType.CREDIT))
-        ).order_by(Transaction.created_at.desc()).limit(limit).offset(offset).all()
+        ).order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(limit).offset(offset).all()
         
         total_count = Transaction.query.filter(
             ((Transaction.sender_account_id == account_id) & (Transaction.transaction_type == TransactionType.DEBIT)) |
@@ -306,7 +450,7 @@ class TransactionService:
                     'transaction_id': t.transaction_id,
                     'sender_account': t.sender_account.account_number,
                     'receiver_account': t.receiver_account.account_number,
-                    'amount': t.amount,
+                    'amount': float(t.amount),
                     'transaction_type': t.transaction_type.value,
                     'description': t.description,
                     'created_at': t.created_at.isoformat()
@@ -376,7 +520,7 @@ class TransactionService:
         total_count = query.count()
         
         # Apply pagination
-        transactions = query.order_by(Transaction.created_at.desc()).limit(limit).offset(offset).all()
+        transactions = query.order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(limit).offset(offset).all()
         
         return {
             'account_id': account_id,
@@ -385,7 +529,7 @@ class TransactionService:
                     'transaction_id': t.transaction_id,
                     'sender_account': t.sender_account.account_number,
                     'receiver_account': t.receiver_account.account_number,
-                    'amount': t.amount,
+                    'amount': float(t.amount),
                     'transaction_type': t.transaction_type.value,
                     'description': t.description,
                     'created_at': t.created_at.isoformat()
@@ -411,14 +555,14 @@ class TransactionService:
         """
         query = Transaction.query
         total_count = query.count()
-        transactions = query.order_by(Transaction.created_at.desc()).limit(limit).offset(offset).all()
+        transactions = query.order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(limit).offset(offset).all()
         return {
             'transactions': [
                 {
                     'transaction_id': t.transaction_id,
                     'sender_account': t.sender_account.account_number,
                     'receiver_account': t.receiver_account.account_number,
-                    'amount': t.amount,
+                    'amount': float(t.amount),
                     'transaction_type': t.transaction_type.value,
                     'description': t.description,
                     'created_at': t.created_at.isoformat()
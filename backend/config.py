@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+from sqlalchemy.pool import StaticPool
 
 class Config:
     """Base configuration."""
@@ -19,6 +20,7 @@ class Config:
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://localhost:3001,http://localhost:5173').split(',')
     
     # Security
+    BCRYPT_LOG_ROUNDS = 12
     MAX_LOGIN_ATTEMPTS = 5
     LOCKOUT_DURATION = 15  # minutes
     
@@ -32,9 +34,19 @@ class DevelopmentConfig(Config):
 
 class TestingConfig(Config):
     """Testing configuration."""
+    DEBUG = False
     TESTING = True
+    PROPAGATE_EXCEPTIONS = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # One shared connection keeps the in-memory database alive for the whole run
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'poolclass': StaticPool,
+        'connect_args': {'check_same_thread': False},
+        'query_cache_size': 1200,
+    }
+    SQLALCHEMY_ECHO = False
     JWT_SECRET_KEY = 'test-secret-key'
+    BCRYPT_LOG_ROUNDS = 4  # bcrypt's minimum cost; keeps hashing cheap in tests
 
 class ProductionConfig(Config):
     """Production configuration."""
@@ -0,0 +1,223 @@
+import logging
+from uuid import uuid4
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from app import create_app
+from app.models import db, Account, AccountStatus, AccountType, to_money
+from app.security import hash_password, verify_password
+
+
+def pytest_configure(config):
+    """Keep Flask and SQLAlchemy quiet below WARNING during the test run."""
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('sqlalchemy').setLevel(logging.WARNING)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _session_app():
+    """Create the application, and its schema, and keep one app context pushed.
+    
+    Tests run inside this context, so they don't push and pop one each. It
+    doesn't depend on ``app`` so that modules overriding ``app`` with a
+    function-scoped fixture still work. The schema is dropped once, when the
+    session ends.
+    """
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture(scope='session')
+def app(_session_app):
+    """The shared application."""
+    return _session_app
+
+@pytest.fixture(scope='module')
+def db_connection():
+    """Bind db.session to one connection whose outer transaction spans the module.
+    
+    The transaction is rolled back when the module finishes. Rows created by
+    module-scoped fixtures are therefore shared by the module's tests but
+    never committed, and the schema never has to be rebuilt.
+    """
+    connection = db.engine.connect()
+    
+    # pysqlite issues its own BEGIN/COMMIT and breaks SAVEPOINT; take over
+    dbapi_connection = connection.connection.dbapi_connection
+    isolation_level = dbapi_connection.isolation_level
+    dbapi_connection.isolation_level = None
+    transaction = connection.begin()
+    connection.exec_driver_sql('BEGIN')
+    
+    original_session = db.session
+    db.session = scoped_session(sessionmaker(
+        bind=connection,
+        join_transaction_mode='create_savepoint',
+        query_cls=db.Query
+    ))
+    
+    yield connection
+    
+    db.session.remove()
+    db.session = original_session
+    transaction.rollback()
+    dbapi_connection.isolation_level = isolation_level
+    connection.close()
+
+@pytest.fixture
+def db_session(db_connection):
+    """Wrap a test in a SAVEPOINT that is rolled back on teardown.
+    
+    Commits made by the code under test only release nested SAVEPOINTs, so
+    nothing a test writes is visible to the next one. Setup fixtures that
+    committed and then read attributes leave the session inside its own
+    SAVEPOINT; it is closed first so the test's SAVEPOINT is the outermost
+    one and a commit can't release it.
+    """
+    db.session.remove()
+    savepoint = db_connection.begin_nested()
+    yield db.session
+    db.session.remove()
+    savepoint.rollback()
+
+def _wipe_tables():
+    """Delete every row, children first, leaving the schema in place."""
+    db.session.remove()
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
+    db.session.remove()
+
+@pytest.fixture(scope='session')
+def wipe_db():
+    """Return a callable that empties every table; needs an app context."""
+    return _wipe_tables
+
+@pytest.fixture
+def clean_db():
+    """Run a test against committed data, then empty the tables.
+    
+    For tests that can't share the db_session transaction, e.g. ones that
+    spread work over several threads.
+    """
+    yield
+    _wipe_tables()
+
+# Emitted by the savepoint fixtures around the code under test; not counted
+_TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+@pytest.fixture
+def assert_max_queries():
+    """Return a context manager that fails if its block runs more than n statements.
+    
+    Transaction control is ignored. The list of counted statements is yielded
+    so a failing test can show what ran.
+    """
+    @contextmanager
+    def max_queries(n):
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if not statement.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+                statements.append(statement)
+        
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        assert len(statements) <= n, f'{len(statements)} queries, expected at most {n}: {statements}'
+    
+    return max_queries
+
+@pytest.fixture(scope='session')
+def client(app):
+    """One test client for the session; the app sets no cookies, so no state carries over."""
+    return app.test_client()
+
+@pytest.fixture
+def account_factory(db_session):
+    """Return a function that inserts an active account directly, bypassing AccountService.
+    
+    For tests that only need an account to exist; tests of account creation
+    itself should keep going through the service.
+    """
+    def make_account(user_id, account_type='checking', balance=1000.0):
+        amount = to_money(balance)
+        account = Account(
+            account_number=f'ACC-{uuid4().int % 10**10:010d}',
+            user_id=user_id,
+            account_type=AccountType(account_type),
+            balance=amount,
+            opening_balance=amount,
+            status=AccountStatus.ACTIVE
+        )
+        db_session.add(account)
+        db_session.flush()
+        return account
+    
+    return make_account
+
+@pytest.fixture(scope='session')
+def precomputed_hashes(_session_app):
+    """bcrypt hashes of the passwords fixtures log in with, computed once per session."""
+    return {password: hash_password(password) for password in ('SecurePass123', 'Admin@123')}
+
+# AuthService imports these by name, so patch the references it holds too
+_HASHING_MODULES = ('app.security', 'app.auth_service')
+
+def _fake_hash_password(password):
+    return f'fake:{password}'
+
+def _fake_verify_password(password, password_hash):
+    return password_hash == f'fake:{password}'
+
+def _patch_hashing(patcher, hash_fn, verify_fn):
+    for target in _HASHING_MODULES:
+        patcher.setattr(f'{target}.hash_password', hash_fn)
+        patcher.setattr(f'{target}.verify_password', verify_fn)
+
+@pytest.fixture
+def fast_hash(monkeypatch):
+    """Replace bcrypt with a trivial reversible scheme for tests that don't exercise hashing."""
+    _patch_hashing(monkeypatch, _fake_hash_password, _fake_verify_password)
+
+@pytest.fixture(scope='module')
+def module_fast_hash():
+    """fast_hash for a whole module, including the users its module-scoped fixtures register.
+    
+    Tests marked ``real_crypto`` get bcrypt back.
+    """
+    with pytest.MonkeyPatch.context() as patcher:
+        _patch_hashing(patcher, _fake_hash_password, _fake_verify_password)
+        yield
+
+@pytest.fixture(autouse=True)
+def _real_crypto(request, monkeypatch):
+    """Restore bcrypt for tests marked real_crypto, undoing module_fast_hash."""
+    if request.node.get_closest_marker('real_crypto'):
+        _patch_hashing(monkeypatch, hash_password, verify_password)
+
+# Modules that import log_audit by name, and so hold their own reference to it
+_AUDIT_LOGGING_MODULES = (
+    'app.security',
+    'app.auth_service',
+    'app.account_service',
+    'app.transaction_service',
+    'app.rbac_service',
+    'app.support_service',
+    'app.admin_routes',
+)
+
+@pytest.fixture
+def no_audit(monkeypatch):
+    """Make log_audit a no-op for tests that don't check the audit trail."""
+    def skip_audit(*args, **kwargs):
+        pass
+    
+    for module in _AUDIT_LOGGING_MODULES:
+        monkeypatch.setattr(f'{module}.log_audit', skip_audit)
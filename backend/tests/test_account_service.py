@@ -1,28 +1,13 @@
 import pytest
-from app import create_app
+from sqlalchemy import update
 from app.models import db, User, Account, UserRole, AccountStatus, AccountType
 from app.auth_service import AuthService
 from app.account_service import AccountService
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-@pytest.fixture
-def app_context(app):
-    """Create application context."""
-    with app.app_context():
-        yield
+pytestmark = pytest.mark.usefixtures('db_session')
 
 @pytest.fixture
-def test_user(app_context):
+def test_user(db_session):
     """Create a test user."""
     result = AuthService.register_user(
         username='testuser',
@@ -31,12 +16,12 @@ def test_user(app_context):
         password='SecurePass123',
         full_name='Test User'
     )
-    return User.query.get(result['user_id'])
+    return db.session.get(User, result['user_id'])
 
 class TestAccountService:
     """Test cases for AccountService."""
     
-    def test_create_account_success(self, app_context, test_user):
+    def test_create_account_success(self, test_user):
         """Test successful account creation."""
         result = AccountService.create_account(
             user_id=test_user.id,
@@ -50,7 +35,7 @@ class TestAccountService:
         assert result['status'] == 'active'
         assert result['account_number'].startswith('ACC-')
     
-    def test_create_account_savings(self, app_context, test_user):
+    def test_create_account_savings(self, test_user):
         """Test creating a savings account."""
         result = AccountService.create_account(
             user_id=test_user.id,
@@ -61,7 +46,7 @@ class TestAccountService:
         assert result['account_type'] == 'savings'
         assert result['balance'] == 5000.0
     
-    def test_create_account_invalid_type(self, app_context, test_user):
+    def test_create_account_invalid_type(self, test_user):
         """Test account creation with invalid type."""
         with pytest.raises(ValueError, match='Invalid account type'):
             AccountService.create_account(
@@ -70,7 +55,7 @@ class TestAccountService:
                 opening_balance=1000.0
             )
     
-    def test_create_account_negative_balance(self, app_context, test_user):
+    def test_create_account_negative_balance(self, test_user):
         """Test account creation with negative balance."""
         with pytest.raises(ValueError, match='Opening balance cannot be negative'):
             AccountService.create_account(
@@ -79,7 +64,7 @@ class TestAccountService:
                 opening_balance=-100.0
             )
     
-    def test_create_account_user_not_found(self, app_context):
+    def test_create_account_user_not_found(self):
         """Test account creation for non-existent user."""
         with pytest.raises(ValueError, match='User not found'):
             AccountService.create_account(
@@ -88,7 +73,7 @@ class TestAccountService:
                 opening_balance=1000.0
             )
     
-    def test_get_account_success(self, app_context, test_user):
+    def test_get_account_success(self, test_user):
         """Test getting account information."""
         account_result = AccountService.create_account(
             user_id=test_user.id,
@@ -96,19 +81,19 @@ class TestAccountService:
             opening_balance=1000.0
         )
         
-        account = Account.query.get(account_result['account_id'])
+        account = db.session.get(Account, account_result['account_id'])
         result = AccountService.get_account(account.id)
         
         assert result['account_number'] == account.account_number
         assert result['balance'] == 1000.0
         assert result['status'] == 'active'
     
-    def test_get_account_not_found(self, app_context):
+    def test_get_account_not_found(self):
         """Test getting non-existent account."""
         with pytest.raises(ValueError, match='Account not found'):
             AccountService.get_account(999)
     
-    def test_get_user_accounts(self, app_context, test_user):
+    def test_get_user_accounts(self, test_user):
         """Test getting all accounts for a user."""
         # Create multiple accounts
         AccountService.create_account(
@@ -129,7 +114,7 @@ class TestAccountService:
         assert result[0]['account_type'] in ['checking', 'savings']
         assert result[1]['account_type'] in ['checking', 'savings']
     
-    def test_freeze_account_success(self, app_context, test_user):
+    def test_freeze_account_success(self, test_user):
         """Test successful account freeze."""
         account_result = AccountService.create_account(
             user_id=test_user.id,
@@ -137,7 +122,7 @@ class TestAccountService:
             opening_balance=1000.0
         )
         
-        account = Account.query.get(account_result['account_id'])
+        account = db.session.get(Account, account_result['account_id'])
         
         result = AccountService.freeze_account(account.id, test_user.id)
         
@@ -145,10 +130,10 @@ class TestAccountService:
         assert result['status'] == 'frozen'
         
         # Verify account is frozen in database
-        account = Account.query.get(account.id)
+        account = db.session.get(Account, account.id)
         assert account.status == AccountStatus.FROZEN
     
-    def test_freeze_account_already_frozen(self, app_context, test_user):
+    def test_freeze_account_already_frozen(self, test_user):
         """Test freezing an already frozen account."""
         account_result = AccountService.create_account(
             user_id=test_user.id,
@@ -156,14 +141,14 @@ class TestAccountService:
             opening_balance=1000.0
         )
         
-        account = Account.query.get(account_result['account_id'])
+        account = db.session.get(Account, account_result['account_id'])
         
         AccountService.freeze_account(account.id, test_user.id)
         
         with pytest.raises(ValueError, match='Account is already frozen'):
             AccountService.freeze_account(account.id, test_user.id)
     
-    def test_unfreeze_account_success(self, app_context, test_user):
+    def test_unfreeze_account_success(self, test_user):
         """Test successful account unfreeze."""
         account_result = AccountService.create_account(
             user_id=test_user.id,
@@ -171,7 +156,7 @@ class TestAccountService:
             opening_balance=1000.0
         )
         
-        account = Account.query.get(account_result['account_id'])
+        account = db.session.get(Account, account_result['account_id'])
         
         AccountService.freeze_account(account.id, test_user.id)
         result = AccountService.unfreeze_account(account.id, test_user.id)
@@ -180,10 +165,10 @@ class TestAccountService:
         assert result['status'] == 'active'
         
         # Verify account is active in database
-        account = Account.query.get(account.id)
+        account = db.session.get(Account, account.id)
         assert account.status == AccountStatus.ACTIVE
     
-    def test_unfreeze_account_not_frozen(self, app_context, test_user):
+    def test_unfreeze_account_not_frozen(self, test_user):
         """Test unfreezing an account that is not frozen."""
         account_result = AccountService.create_account(
             user_id=test_user.id,
@@ -191,12 +176,53 @@ class TestAccountService:
             opening_balance=1000.0
         )
         
-        account = Account.query.get(account_result['account_id'])
+        account = db.session.get(Account, account_result['account_id'])
+        
+        with pytest.raises(ValueError, match='Account is not frozen'):
+            AccountService.unfreeze_account(account.id, test_user.id)
+    
+    def test_freeze_account_frozen_after_check(self, test_user):
+        """Test that freezing fails if the account is frozen after the status was read."""
+        account_result = AccountService.create_account(
+            user_id=test_user.id,
+            account_type='checking',
+            opening_balance=1000.0
+        )
+        
+        account = db.session.get(Account, account_result['account_id'])
+        
+        # Another admin freezes the account behind the loaded copy
+        db.session.execute(
+            update(Account.__table__)
+            .where(Account.__table__.c.id == account.id)
+            .values(status=AccountStatus.FROZEN)
+        )
+        
+        with pytest.raises(ValueError, match='Account is already frozen'):
+            AccountService.freeze_account(account.id, test_user.id)
+    
+    def test_unfreeze_account_unfrozen_after_check(self, test_user):
+        """Test that unfreezing fails if the account is unfrozen after the status was read."""
+        account_result = AccountService.create_account(
+            user_id=test_user.id,
+            account_type='checking',
+            opening_balance=1000.0
+        )
+        AccountService.freeze_account(account_result['account_id'], test_user.id)
+        
+        account = db.session.get(Account, account_result['account_id'])
+        
+        # Another admin unfreezes the account behind the loaded copy
+        db.session.execute(
+            update(Account.__table__)
+            .where(Account.__table__.c.id == account.id)
+            .values(status=AccountStatus.ACTIVE)
+        )
         
         with pytest.raises(ValueError, match='Account is not frozen'):
             AccountService.unfreeze_account(account.id, test_user.id)
     
-    def test_get_account_balance(self, app_context, test_user):
+    def test_get_account_balance(self, test_user):
         """Test getting account balance."""
         account_result = AccountService.create_account(
             user_id=test_user.id,
@@ -204,13 +230,13 @@ class TestAccountService:
             opening_balance=1500.0
         )
         
-        account = Account.query.get(account_result['account_id'])
+        account = db.session.get(Account, account_result['account_id'])
         result = AccountService.get_account_balance(account.id)
         
         assert result['balance'] == 1500.0
         assert result['status'] == 'active'
     
-    def test_close_account_success(self, app_context, test_user):
+    def test_close_account_success(self, test_user):
         """Test successful account closure."""
         account_result = AccountService.create_account(
             user_id=test_user.id,
@@ -218,14 +244,14 @@ class TestAccountService:
             opening_balance=0.0
         )
         
-        account = Account.query.get(account_result['account_id'])
+        account = db.session.get(Account, account_result['account_id'])
         
         result = AccountService.close_account(account.id, test_user.id)
         
         assert result['success'] is True
         assert result['status'] == 'closed'
     
-    def test_close_account_with_balance(self, app_context, test_user):
+    def test_close_account_with_balance(self, test_user):
         """Test closing account with remaining balance."""
         account_result = AccountService.create_account(
             user_id=test_user.id,
@@ -233,12 +259,12 @@ class TestAccountService:
             opening_balance=1000.0
         )
         
-        account = Account.query.get(account_result['account_id'])
+        account = db.session.get(Account, account_result['account_id'])
         
         with pytest.raises(ValueError, match='Cannot close account with remaining balance'):
             AccountService.close_account(account.id, test_user.id)
     
-    def test_account_number_uniqueness(self, app_context, test_user):
+    def test_account_number_uniqueness(self, test_user):
         """Test that account numbers are unique."""
         result1 = AccountService.create_account(
             user_id=test_user.id,
@@ -253,3 +279,26 @@ class TestAccountService:
         )
         
         assert result1['account_number'] != result2['account_number']
+    
+    def test_bulk_create_accounts(self, test_user):
+        """Test creating several accounts in one call."""
+        results = AccountService.bulk_create_accounts(test_user.id, [
+            {'account_type': 'checking', 'opening_balance': 100.0},
+            {'account_type': 'savings', 'opening_balance': 250.5},
+            {'account_type': 'checking'}
+        ])
+        
+        assert [r['account_type'] for r in results] == ['checking', 'savings', 'checking']
+        assert [r['balance'] for r in results] == [100.0, 250.5, 0.0]
+        assert len({r['account_number'] for r in results}) == 3
+        assert Account.query.filter_by(user_id=test_user.id).count() == 3
+    
+    def test_bulk_create_accounts_over_limit(self, test_user):
+        """Test that a batch exceeding the account limit creates nothing."""
+        with pytest.raises(ValueError, match='Account limit reached'):
+            AccountService.bulk_create_accounts(
+                test_user.id,
+                [{'account_type': 'checking'} for _ in range(21)]
+            )
+        
+        assert Account.query.filter_by(user_id=test_user.id).count() == 0
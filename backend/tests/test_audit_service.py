@@ -1,30 +1,14 @@
 import pytest
 from datetime import datetime, timedelta
-from app import create_app
 from app.models import db, User, AuditLog, AuditAction, UserRole
 from app.auth_service import AuthService
 from app.audit_service import AuditService
 from app.security import log_audit
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-@pytest.fixture
-def app_context(app):
-    """Create application context."""
-    with app.app_context():
-        yield
+pytestmark = pytest.mark.usefixtures('db_session')
 
 @pytest.fixture
-def test_user(app_context):
+def test_user(db_session):
     """Create a test user."""
     result = AuthService.register_user(
         username='testuser',
@@ -33,10 +17,10 @@ def test_user(app_context):
         password='SecurePass123',
         full_name='Test User'
     )
-    return User.query.get(result['user_id'])
+    return db.session.get(User, result['user_id'])
 
 @pytest.fixture
-def test_auditor(app_context):
+def test_auditor(db_session):
     """Create a test auditor."""
     result = AuthService.register_user(
         username='auditor',
@@ -45,7 +29,7 @@ def test_auditor(app_context):
         password='SecurePass123',
         full_name='Test Auditor'
     )
-    user = User.query.get(result['user_id'])
+    user = db.session.get(User, result['user_id'])
     user.role = UserRole.AUDITOR
     db.session.commit()
     return user
@@ -53,7 +37,7 @@ def test_auditor(app_context):
 class TestAuditService:
     """Test cases for AuditService."""
     
-    def test_get_audit_logs_success(self, app_context, test_user, test_auditor):
+    def test_get_audit_logs_success(self, test_user, test_auditor):
         """Test getting audit logs."""
         # Create some audit logs
         for i in range(3):
@@ -70,7 +54,7 @@ class TestAuditService:
         assert result['total_count'] >= 3
         assert len(result['logs']) >= 3
     
-    def test_get_audit_logs_with_action_filter(self, app_context, test_user):
+    def test_get_audit_logs_with_action_filter(self, test_user):
         """Test getting audit logs filtered by action."""
         # Create logs with different actions
         log_audit(
@@ -91,7 +75,7 @@ class TestAuditService:
         
         assert all(log['action'] == 'login' for log in result['logs'])
     
-    def test_get_audit_logs_with_user_filter(self, app_context, test_user):
+    def test_get_audit_logs_with_user_filter(self, test_user):
         """Test getting audit logs filtered by user."""
         # Create logs for specific user
         log_audit(
@@ -105,7 +89,7 @@ class TestAuditService:
         
         assert all(log['user_id'] == test_user.id for log in result['logs'])
     
-    def test_get_audit_logs_with_date_filter(self, app_context, test_user):
+    def test_get_audit_logs_with_date_filter(self, test_user):
         """Test getting audit logs filtered by date range."""
         # Create a log
         log_audit(
@@ -122,12 +106,12 @@ class TestAuditService:
         
         assert result['total_count'] >= 1
     
-    def test_get_audit_logs_invalid_action(self, app_context):
+    def test_get_audit_logs_invalid_action(self):
         """Test getting audit logs with invalid action."""
         with pytest.raises(ValueError, match='Invalid action'):
             AuditService.get_audit_logs(action='invalid_action')
     
-    def test_get_user_audit_logs_success(self, app_context, test_user):
+    def test_get_user_audit_logs_success(self, test_user):
         """Test getting audit logs for a specific user."""
         # Create logs for the user
         for i in range(2):
@@ -143,12 +127,12 @@ class TestAuditService:
         assert result['user_id'] == test_user.id
         assert result['total_count'] >= 2
     
-    def test_get_user_audit_logs_not_found(self, app_context):
+    def test_get_user_audit_logs_not_found(self):
         """Test getting audit logs for non-existent user."""
         with pytest.raises(ValueError, match='User not found'):
             AuditService.get_user_audit_logs(999)
     
-    def test_get_login_attempts_success(self, app_context, test_user):
+    def test_get_login_attempts_success(self, test_user):
         """Test getting login attempts."""
         # Create login logs
         log_audit(
@@ -173,7 +157,7 @@ class TestAuditService:
         assert any(log['action'] == 'login' for log in result['logs'])
         assert any(log['action'] == 'login_failed' for log in result['logs'])
     
-    def test_get_login_attempts_filtered_by_user(self, app_context, test_user):
+    def test_get_login_attempts_filtered_by_user(self, test_user):
         """Test getting login attempts for a specific user."""
         log_audit(
             user_id=test_user.id,
@@ -186,7 +170,7 @@ class TestAuditService:
         
         assert all(log['user_id'] == test_user.id for log in result['logs'])
     
-    def test_get_suspicious_activities_success(self, app_context, test_user):
+    def test_get_suspicious_activities_success(self, test_user):
         """Test getting suspicious activities."""
         # Create suspicious activity logs
         log_audit(
@@ -202,7 +186,7 @@ class TestAuditService:
         assert result['total_count'] >= 1
         assert all(log['action'] == 'suspicious_activity' for log in result['logs'])
     
-    def test_get_admin_actions_success(self, app_context, test_user):
+    def test_get_admin_actions_success(self, test_user):
         """Test getting admin actions."""
         # Create admin action logs
         log_audit(
@@ -218,7 +202,7 @@ class TestAuditService:
         assert result['total_count'] >= 1
         assert all(log['action'] == 'admin_action' for log in result['logs'])
     
-    def test_get_account_freeze_logs_success(self, app_context, test_user):
+    def test_get_account_freeze_logs_success(self, test_user):
         """Test getting account freeze logs."""
         # Create freeze logs
         log_audit(
@@ -244,7 +228,7 @@ class TestAuditService:
         assert 'account_freeze' in actions
         assert 'account_unfreeze' in actions
     
-    def test_audit_log_pagination(self, app_context, test_user):
+    def test_audit_log_pagination(self, test_user):
         """Test pagination of audit logs."""
         # Create multiple logs
         for i in range(15):
@@ -265,7 +249,7 @@ class TestAuditService:
         assert len(result2['logs']) == 5
         assert result1['logs'][0] != result2['logs'][0]
     
-    def test_audit_log_ip_address(self, app_context, test_user):
+    def test_audit_log_ip_address(self, test_user):
         """Test that IP address is logged."""
         log_audit(
             user_id=test_user.id,
@@ -279,7 +263,7 @@ class TestAuditService:
         
         assert any(log['ip_address'] == '192.168.1.1' for log in result['logs'])
     
-    def test_audit_log_details(self, app_context, test_user):
+    def test_audit_log_details(self, test_user):
         """Test that details are logged."""
         details = 'User attempted to access restricted resource'
         
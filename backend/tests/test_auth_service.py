@@ -1,36 +1,29 @@
+import re
 import pytest
 from datetime import datetime
-from app import create_app
 from app.models import db, User, UserRole
 from app.auth_service import AuthService
 from app.security import verify_password
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-@pytest.fixture
-def client(app):
-    """Create test client."""
-    return app.test_client()
+# Error-message patterns, compiled once for pytest.raises(match=...)
+DUPLICATE_USER_RE = re.compile(r'Username or email already exists')
+INVALID_EMAIL_RE = re.compile(r'Invalid email format')
+INVALID_PHONE_RE = re.compile(r'Invalid phone format')
+SHORT_PASSWORD_RE = re.compile(r'Password must be at least 8 characters')
+SHORT_USERNAME_RE = re.compile(r'Username must be at least 3 characters')
+INVALID_CREDENTIALS_RE = re.compile(r'Invalid username or password')
+LOCKOUT_RE = re.compile(r'Too many failed login attempts')
+INVALID_CURRENT_PASSWORD_RE = re.compile(r'Invalid current password')
+SAME_PASSWORD_RE = re.compile(r'New password must be different')
+USER_NOT_FOUND_RE = re.compile(r'User not found')
+EMAIL_IN_USE_RE = re.compile(r'Email already in use')
 
-@pytest.fixture
-def app_context(app):
-    """Create application context."""
-    with app.app_context():
-        yield
+pytestmark = pytest.mark.usefixtures('db_session')
 
 class TestAuthService:
     """Test cases for AuthService."""
     
-    def test_register_user_success(self, app_context):
+    def test_register_user_success(self):
         """Test successful user registration."""
         result = AuthService.register_user(
             username='testuser',
@@ -50,7 +43,8 @@ class TestAuthService:
         assert user is not None
         assert user.email == 'test@example.com'
     
-    def test_register_user_duplicate_username(self, app_context):
+    @pytest.mark.usefixtures('fast_hash')
+    def test_register_user_duplicate_username(self):
         """Test registration with duplicate username."""
         AuthService.register_user(
             username='testuser',
@@ -60,7 +54,7 @@ class TestAuthService:
             full_name='Test User'
         )
         
-        with pytest.raises(ValueError, match='Username or email already exists'):
+        with pytest.raises(ValueError, match=DUPLICATE_USER_RE):
             AuthService.register_user(
                 username='testuser',
                 email='test2@example.com',
@@ -69,7 +63,8 @@ class TestAuthService:
                 full_name='Another User'
             )
     
-    def test_register_user_duplicate_email(self, app_context):
+    @pytest.mark.usefixtures('fast_hash')
+    def test_register_user_duplicate_email(self):
         """Test registration with duplicate email."""
         AuthService.register_user(
             username='testuser1',
@@ -79,7 +74,7 @@ class TestAuthService:
             full_name='Test User'
         )
         
-        with pytest.raises(ValueError, match='Username or email already exists'):
+        with pytest.raises(ValueError, match=DUPLICATE_USER_RE):
             AuthService.register_user(
                 username='testuser2',
                 email='test@example.com',
@@ -88,9 +83,9 @@ class TestAuthService:
                 full_name='Another User'
             )
     
-    def test_register_user_invalid_email(self, app_context):
+    def test_register_user_invalid_email(self):
         """Test registration with invalid email."""
-        with pytest.raises(ValueError, match='Invalid email format'):
+        with pytest.raises(ValueError, match=INVALID_EMAIL_RE):
             AuthService.register_user(
                 username='testuser',
                 email='invalid-email',
@@ -99,9 +94,9 @@ class TestAuthService:
                 full_name='Test User'
             )
     
-    def test_register_user_invalid_phone(self, app_context):
+    def test_register_user_invalid_phone(self):
         """Test registration with invalid phone."""
-        with pytest.raises(ValueError, match='Invalid phone format'):
+        with pytest.raises(ValueError, match=INVALID_PHONE_RE):
             AuthService.register_user(
                 username='testuser',
                 email='test@example.com',
@@ -110,9 +105,9 @@ class TestAuthService:
                 full_name='Test User'
             )
     
-    def test_register_user_short_password(self, app_context):
+    def test_register_user_short_password(self):
         """Test registration with short password."""
-        with pytest.raises(ValueError, match='Password must be at least 8 characters'):
+        with pytest.raises(ValueError, match=SHORT_PASSWORD_RE):
             AuthService.register_user(
                 username='testuser',
                 email='test@example.com',
@@ -121,9 +116,9 @@ class TestAuthService:
                 full_name='Test User'
             )
     
-    def test_register_user_short_username(self, app_context):
+    def test_register_user_short_username(self):
         """Test registration with short username."""
-        with pytest.raises(ValueError, match='Username must be at least 3 characters'):
+        with pytest.raises(ValueError, match=SHORT_USERNAME_RE):
             AuthService.register_user(
                 username='ab',
                 email='test@example.com',
@@ -132,7 +127,7 @@ class TestAuthService:
                 full_name='Test User'
             )
     
-    def test_login_success(self, app_context):
+    def test_login_success(self):
         """Test successful login."""
         AuthService.register_user(
             username='testuser',
@@ -150,12 +145,12 @@ class TestAuthService:
         assert result['username'] == 'testuser'
         assert result['role'] == 'customer'
     
-    def test_login_invalid_username(self, app_context):
+    def test_login_invalid_username(self):
         """Test login with invalid username."""
-        with pytest.raises(ValueError, match='Invalid username or password'):
+        with pytest.raises(ValueError, match=INVALID_CREDENTIALS_RE):
             AuthService.login('nonexistent', 'password')
     
-    def test_login_invalid_password(self, app_context):
+    def test_login_invalid_password(self):
         """Test login with invalid password."""
         AuthService.register_user(
             username='testuser',
@@ -165,10 +160,10 @@ class TestAuthService:
             full_name='Test User'
         )
         
-        with pytest.raises(ValueError, match='Invalid username or password'):
+        with pytest.raises(ValueError, match=INVALID_CREDENTIALS_RE):
             AuthService.login('testuser', 'WrongPassword')
     
-    def test_login_account_lockout(self, app_context):
+    def test_login_account_lockout(self):
         """Test account lockout after multiple failed login attempts."""
         AuthService.register_user(
             username='testuser',
@@ -184,10 +179,10 @@ class TestAuthService:
                 AuthService.login('testuser', 'WrongPassword')
         
         # Next login attempt should fail with account locked message
-        with pytest.raises(ValueError, match='Too many failed login attempts'):
+        with pytest.raises(ValueError, match=LOCKOUT_RE):
             AuthService.login('testuser', 'SecurePass123')
     
-    def test_change_password_success(self, app_context):
+    def test_change_password_success(self):
         """Test successful password change."""
         AuthService.register_user(
             username='testuser',
@@ -215,7 +210,7 @@ class TestAuthService:
         result = AuthService.login('testuser', 'NewPassword456')
         assert result['success'] is True
     
-    def test_change_password_invalid_old_password(self, app_context):
+    def test_change_password_invalid_old_password(self):
         """Test password change with invalid old password."""
         AuthService.register_user(
             username='testuser',
@@ -227,14 +222,14 @@ class TestAuthService:
         
         user = User.query.filter_by(username='testuser').first()
         
-        with pytest.raises(ValueError, match='Invalid current password'):
+        with pytest.raises(ValueError, match=INVALID_CURRENT_PASSWORD_RE):
             AuthService.change_password(
                 user_id=user.id,
                 old_password='WrongPassword',
                 new_password='NewPassword456'
             )
     
-    def test_change_password_same_as_old(self, app_context):
+    def test_change_password_same_as_old(self):
         """Test password change with same password as old."""
         AuthService.register_user(
             username='testuser',
@@ -246,14 +241,15 @@ class TestAuthService:
         
         user = User.query.filter_by(username='testuser').first()
         
-        with pytest.raises(ValueError, match='New password must be different'):
+        with pytest.raises(ValueError, match=SAME_PASSWORD_RE):
             AuthService.change_password(
                 user_id=user.id,
                 old_password='SecurePass123',
                 new_password='SecurePass123'
             )
     
-    def test_get_user_success(self, app_context):
+    @pytest.mark.usefixtures('fast_hash')
+    def test_get_user_success(self):
         """Test getting user information."""
         AuthService.register_user(
             username='testuser',
@@ -271,12 +267,13 @@ class TestAuthService:
         assert result['full_name'] == 'Test User'
         assert result['role'] == 'customer'
     
-    def test_get_user_not_found(self, app_context):
+    def test_get_user_not_found(self):
         """Test getting non-existent user."""
-        with pytest.raises(ValueError, match='User not found'):
+        with pytest.raises(ValueError, match=USER_NOT_FOUND_RE):
             AuthService.get_user(999)
     
-    def test_update_profile_success(self, app_context):
+    @pytest.mark.usefixtures('fast_hash')
+    def test_update_profile_success(self):
         """Test successful profile update."""
         AuthService.register_user(
             username='testuser',
@@ -300,7 +297,8 @@ class TestAuthService:
         assert result['phone'] == '+9876543210'
         assert result['full_name'] == 'Updated Name'
     
-    def test_update_profile_invalid_email(self, app_context):
+    @pytest.mark.usefixtures('fast_hash')
+    def test_update_profile_invalid_email(self):
         """Test profile update with invalid email."""
         AuthService.register_user(
             username='testuser',
@@ -312,13 +310,14 @@ class TestAuthService:
         
         user = User.query.filter_by(username='testuser').first()
         
-        with pytest.raises(ValueError, match='Invalid email format'):
+        with pytest.raises(ValueError, match=INVALID_EMAIL_RE):
             AuthService.update_profile(
                 user_id=user.id,
                 email='invalid-email'
             )
     
-    def test_update_profile_duplicate_email(self, app_context):
+    @pytest.mark.usefixtures('fast_hash')
+    def test_update_profile_duplicate_email(self):
         """Test profile update with duplicate email."""
         AuthService.register_user(
             username='testuser1',
@@ -338,7 +337,7 @@ class TestAuthService:
         
         user1 = User.query.filter_by(username='testuser1').first()
         
-        with pytest.raises(ValueError, match='Email already in use'):
+        with pytest.raises(ValueError, match=EMAIL_IN_USE_RE):
             AuthService.update_profile(
                 user_id=user1.id,
                 email='test2@example.com'
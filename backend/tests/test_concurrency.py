@@ -1,97 +1,115 @@
 import pytest
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from collections import namedtuple
+from sqlalchemy import update
+from config import config, TestingConfig
 from app import create_app
-from app.models import db, User, Account
+from app.models import db, User, Account, AccountType, AccountStatus
 from app.auth_service import AuthService
 from app.account_service import AccountService
 from app.transaction_service import TransactionService
+from app.security import generate_account_number
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
+ConcurrencyUser = namedtuple('ConcurrencyUser', ['user_id', 'account_ids'])
+
+# Opening balances of the shared accounts, restored before every test
+CONCURRENCY_BALANCES = (1000.0, 0.0, 0.0)
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """A file-backed application for the threaded tests.
+    
+    The shared test app keeps its in-memory database on one StaticPool
+    connection. Worker threads would share that connection and commit or
+    roll back each other's work. A database file gives every thread its own
+    connection, and SQLite's locking serializes the writers.
+    """
+    class ConcurrencyConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path_factory.mktemp('concurrency') / 'test.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+    
+    with pytest.MonkeyPatch.context() as patcher:
+        patcher.setitem(config, 'concurrency', ConcurrencyConfig)
+        app = create_app('concurrency')
+    
+    yield app
     
     with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
+        db.engine.dispose()
+
+@pytest.fixture(scope='class')
+def setup_concurrency_user(app, wipe_db):
+    """Register one user with three accounts for the whole test class."""
+    with app.app_context():
+        result = AuthService.register_user(
+            username='testuser',
+            email='test@example.com',
+            phone='+1234567890',
+            password='SecurePass123',
+            full_name='Test User'
+        )
+        
+        account_ids = tuple(
+            AccountService.create_account(
+                user_id=result['user_id'],
+                account_type='checking' if i == 0 else 'savings',
+                opening_balance=balance
+            )['account_id']
+            for i, balance in enumerate(CONCURRENCY_BALANCES)
+        )
+        
+        yield ConcurrencyUser(result['user_id'], account_ids)
+        wipe_db()
 
 @pytest.fixture
-def app_context(app):
-    """Create application context."""
+def concurrency_user(app, setup_concurrency_user):
+    """Reset the shared accounts to their opening state before a test."""
     with app.app_context():
-        yield
+        db.session.execute(update(Account), [
+            {'id': account_id, 'balance': balance, 'status': AccountStatus.ACTIVE}
+            for account_id, balance in zip(setup_concurrency_user.account_ids, CONCURRENCY_BALANCES)
+        ])
+        db.session.commit()
+        db.session.remove()
+    return setup_concurrency_user
 
 
+@pytest.mark.usefixtures('setup_concurrency_user')
 class TestConcurrentTransactions:
     """Test concurrent transaction scenarios."""
     
-    def test_concurrent_transfers_from_same_account(self, app):
+    def test_concurrent_transfers_from_same_account(self, app, concurrency_user):
         """Test multiple simultaneous transfers from same account."""
         with app.app_context():
-            # Create user and account
-            result = AuthService.register_user(
-                username='testuser',
-                email='test@example.com',
-                phone='+1234567890',
-                password='SecurePass123',
-                full_name='Test User'
-            )
-            
-            account1 = AccountService.create_account(
-                user_id=result['user_id'],
-                account_type='checking',
-                opening_balance=1000.0
-            )
-            
-            account2 = AccountService.create_account(
-                user_id=result['user_id'],
-                account_type='savings',
-                opening_balance=0.0
-            )
-            
-            account3 = AccountService.create_account(
-                user_id=result['user_id'],
-                account_type='savings',
-                opening_balance=0.0
-            )
-            
-            errors = []
-            successes = []
+            account1_id, account2_id, account3_id = concurrency_user.account_ids
             
             def transfer(sender_id, receiver_id, amount):
                 """Perform transfer in thread."""
-                try:
-                    with app.app_context():
-                        result = TransactionService.internal_transfer(
-                            sender_user_id=result['user_id'],
-                            sender_account_id=sender_id,
-                            receiver_account_id=receiver_id,
-                            amount=amount
-                        )
-                        successes.append(result)
-                except Exception as e:
-                    errors.append(str(e))
-            
-            # Create threads for concurrent transfers
-            threads = []
-            for i in range(3):
-                t = threading.Thread(
-                    target=transfer,
-                    args=(account1['account_id'], 
-                          account2['account_id'] if i % 2 == 0 else account3['account_id'],
-                          400.0)
-                )
-                threads.append(t)
+                with app.app_context():
+                    result = TransactionService.internal_transfer(
+                        sender_user_id=concurrency_user.user_id,
+                        sender_account_id=sender_id,
+                        receiver_account_id=receiver_id,
+                        amount=amount
+                    )
+                    return result
             
-            # Start all threads
-            for t in threads:
-                t.start()
+            # Run the transfers concurrently
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [
+                    executor.submit(
+                        transfer,
+                        account1_id,
+                        account2_id if i % 2 == 0 else account3_id,
+                        400.0
+                    )
+                    for i in range(3)
+                ]
             
-            # Wait for all to complete
-            for t in threads:
-                t.join()
+            errors = [f.exception() for f in futures if f.exception() is not None]
+            successes = [f.result() for f in futures if f.exception() is None]
             
             # At least some should fail due to insufficient balance
             # Total requested: 1200, available: 1000
@@ -99,115 +117,97 @@ class TestConcurrentTransactions:
             
             # Verify final balance consistency
             with app.app_context():
-                final_account1 = Account.query.get(account1['account_id'])
-                final_account2 = Account.query.get(account2['account_id'])
-                final_account3 = Account.query.get(account3['account_id'])
+                final_account1 = db.session.get(Account, account1_id)
+                final_account2 = db.session.get(Account, account2_id)
+                final_account3 = db.session.get(Account, account3_id)
                 
                 total = final_account1.balance + final_account2.balance + final_account3.balance
                 # Total should still be 1000 (conservation of money)
-                assert abs(total - 1000.0) < 0.01
+                assert total == Decimal('1000.00')
     
-    def test_concurrent_account_freeze_unfreeze(self, app):
+    def test_concurrent_account_freeze_unfreeze(self, app, concurrency_user):
         """Test concurrent freeze/unfreeze operations."""
         with app.app_context():
-            result = AuthService.register_user(
-                username='testuser',
-                email='test@example.com',
-                phone='+1234567890',
-                password='SecurePass123',
-                full_name='Test User'
-            )
-            
-            account = AccountService.create_account(
-                user_id=result['user_id'],
-                account_type='checking',
-                opening_balance=1000.0
-            )
-            
-            results = []
+            account_id = concurrency_user.account_ids[0]
             
             def freeze_account():
                 """Freeze account in thread."""
-                try:
-                    with app.app_context():
-                        result = AccountService.freeze_account(
-                            account['account_id'],
-                            result['user_id']
-                        )
-                        results.append(('freeze', result))
-                except Exception as e:
-                    results.append(('freeze_error', str(e)))
+                with app.app_context():
+                    result = AccountService.freeze_account(
+                        account_id,
+                        concurrency_user.user_id
+                    )
+                    return result
             
             def unfreeze_account():
                 """Unfreeze account in thread."""
-                try:
-                    with app.app_context():
-                        result = AccountService.unfreeze_account(
-                            account['account_id'],
-                            result['user_id']
-                        )
-                        results.append(('unfreeze', result))
-                except Exception as e:
-                    results.append(('unfreeze_error', str(e)))
+                with app.app_context():
+                    result = AccountService.unfreeze_account(
+                        account_id,
+                        concurrency_user.user_id
+                    )
+                    return result
             
-            # Run concurrent freeze/unfreeze
-            threads = [
-                threading.Thread(target=freeze_account),
-                threading.Thread(target=unfreeze_account),
-                threading.Thread(target=freeze_account),
+            # Run concurrent freeze/unfreeze; with one more freeze than can
+            # alternate with the unfreeze, at least one must conflict
+            operations = [
+                ('freeze', freeze_account),
+                ('unfreeze', unfreeze_account),
+                ('freeze', freeze_account),
+                ('freeze', freeze_account),
             ]
             
-            for t in threads:
-                t.start()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [(name, executor.submit(fn)) for name, fn in operations]
             
-            for t in threads:
-                t.join()
+            results = [
+                (f'{name}_error', str(f.exception())) if f.exception() is not None else (name, f.result())
+                for name, f in futures
+            ]
+            
+            with app.app_context():
+                final_status = db.session.get(Account, account_id).status
             
             # Should have some errors due to state conflicts
-            assert len(results) == 3
+            assert len(results) == 4
             assert any('error' in r[0] for r in results)
+            
+            # Successful operations alternate from active, so the freezes that
+            # went through outnumber the unfreezes by exactly the final state
+            outcomes = [r[0] for r in results]
+            assert (outcomes.count('freeze') - outcomes.count('unfreeze')
+                    == (1 if final_status == AccountStatus.FROZEN else 0))
     
     def test_concurrent_user_registrations_same_username(self, app):
         """Test concurrent registrations with same username."""
-        errors = []
-        successes = []
-        
         def register_user(username):
             """Register user in thread."""
-            try:
-                with app.app_context():
-                    result = AuthService.register_user(
-                        username=username,
-                        email=f'{username}{threading.get_ident()}@example.com',
-                        phone='+1234567890',
-                        password='SecurePass123',
-                        full_name='Test User'
-                    )
-                    successes.append(result)
-            except Exception as e:
-                errors.append(str(e))
+            with app.app_context():
+                return AuthService.register_user(
+                    username=username,
+                    email=f'{username}{threading.get_ident()}@example.com',
+                    phone='+1234567890',
+                    password='SecurePass123',
+                    full_name='Test User'
+                )
         
         # Try to register same username concurrently
-        threads = []
-        for i in range(5):
-            t = threading.Thread(target=register_user, args=('duplicate_user',))
-            threads.append(t)
-        
-        for t in threads:
-            t.start()
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(register_user, 'duplicate_user') for _ in range(5)]
         
-        for t in threads:
-            t.join()
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        successes = [f.result() for f in futures if f.exception() is None]
         
         # Only one should succeed
         assert len(successes) == 1
         assert len(errors) == 4
 
 
+@pytest.mark.usefixtures('db_session')
 class TestBalanceConsistency:
     """Test that account balances remain consistent."""
     
-    def test_internal_transfer_balance_conservation(self, app_context):
+    def test_internal_transfer_balance_conservation(self):
         """Test that internal transfers conserve total balance."""
         # Create users and accounts
         result = AuthService.register_user(
@@ -231,7 +231,7 @@ class TestBalanceConsistency:
             opening_balance=500.0
         )
         
-        initial_total = 1500.0
+        initial_total = Decimal('1500.00')
         
         # Perform internal transfer (same user, different accounts)
         TransactionService.internal_transfer(
@@ -242,15 +242,15 @@ class TestBalanceConsistency:
         )
         
         # Check balances
-        acc1 = Account.query.get(account1['account_id'])
-        acc2 = Account.query.get(account2['account_id'])
+        acc1 = db.session.get(Account, account1['account_id'])
+        acc2 = db.session.get(Account, account2['account_id'])
         
         final_total = acc1.balance + acc2.balance
         
         # Total should be conserved
-        assert abs(final_total - initial_total) < 0.01
+        assert final_total == initial_total
     
-    def test_multiple_transfers_preserve_total(self, app_context):
+    def test_multiple_transfers_preserve_total(self):
         """Test that multiple transfers preserve system total balance."""
         # Create ONE user with MULTIPLE accounts
         result = AuthService.register_user(
@@ -261,17 +261,26 @@ class TestBalanceConsistency:
             full_name='Multi Account User'
         )
         
-        # Create 5 accounts for the same user
-        accounts = []
-        for i in range(5):
-            account = AccountService.create_account(
+        # Create 5 accounts for the same user in a single commit
+        db.session.bulk_save_objects([
+            Account(
+                account_number=generate_account_number(),
                 user_id=result['user_id'],
-                account_type='checking' if i % 2 == 0 else 'savings',
-                opening_balance=1000.0
+                account_type=AccountType.CHECKING if i % 2 == 0 else AccountType.SAVINGS,
+                balance=1000.0,
+                opening_balance=1000.0,
+                status=AccountStatus.ACTIVE
             )
-            accounts.append(account)
+            for i in range(5)
+        ])
+        db.session.commit()
+        
+        accounts = [
+            {'account_id': acc.id}
+            for acc in Account.query.filter_by(user_id=result['user_id']).order_by(Account.id)
+        ]
         
-        initial_total = 5000.0
+        initial_total = Decimal('5000.00')
         
         # Perform random internal transfers (all same user)
         TransactionService.internal_transfer(
@@ -297,14 +306,14 @@ class TestBalanceConsistency:
         
         # Calculate final total
         final_total = sum(
-            Account.query.get(acc['account_id']).balance 
+            db.session.get(Account, acc['account_id']).balance 
             for acc in accounts
         )
         
         # Total should be conserved
-        assert abs(final_total - initial_total) < 0.01
+        assert final_total == initial_total
     
-    def test_transaction_atomicity(self, app_context):
+    def test_transaction_atomicity(self):
         """Test that failed transactions don't partially update balances."""
         result = AuthService.register_user(
             username='testuser',
@@ -326,8 +335,8 @@ class TestBalanceConsistency:
             opening_balance=500.0
         )
         
-        initial_balance1 = Account.query.get(account1['account_id']).balance
-        initial_balance2 = Account.query.get(account2['account_id']).balance
+        initial_balance1 = db.session.get(Account, account1['account_id']).balance
+        initial_balance2 = db.session.get(Account, account2['account_id']).balance
         
         # Try to transfer more than available (should fail)
         try:
@@ -341,8 +350,8 @@ class TestBalanceConsistency:
             pass  # Expected to fail
         
         # Balances should be unchanged
-        final_balance1 = Account.query.get(account1['account_id']).balance
-        final_balance2 = Account.query.get(account2['account_id']).balance
+        final_balance1 = db.session.get(Account, account1['account_id']).balance
+        final_balance2 = db.session.get(Account, account2['account_id']).balance
         
         assert final_balance1 == initial_balance1
         assert final_balance2 == initial_balance2
@@ -1,47 +1,31 @@
 import pytest
-import json
-from app import create_app
 from app.models import db, User
 from app.auth_service import AuthService
+from app.security import generate_csrf_token
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
+pytestmark = pytest.mark.usefixtures('db_session', 'fast_hash')
 
 @pytest.fixture
-def client(app):
-    """Create test client."""
-    return app.test_client()
-
-@pytest.fixture
-def auth_headers(app, client):
+def auth_headers(client):
     """Create authentication headers with JWT token."""
-    with app.app_context():
-        # Register and login a user
-        result = AuthService.register_user(
-            username='csrfuser',
-            email='csrf@example.com',
-            phone='+1234567890',
-            password='SecurePass123',
-            full_name='CSRF User'
-        )
-        
-        response = client.post('/api/auth/login', 
-            json={'username': 'csrfuser', 'password': 'SecurePass123'}
-        )
-        
-        data = json.loads(response.data)
-        return {
-            'Authorization': f"Bearer {data['access_token']}",
-            'Content-Type': 'application/json'
-        }
+    # Register and login a user
+    result = AuthService.register_user(
+        username='csrfuser',
+        email='csrf@example.com',
+        phone='+1234567890',
+        password='SecurePass123',
+        full_name='CSRF User'
+    )
+    
+    response = client.post('/api/auth/login', 
+        json={'username': 'csrfuser', 'password': 'SecurePass123'}
+    )
+    
+    data = response.get_json()
+    return {
+        'Authorization': f"Bearer {data['access_token']}",
+        'Content-Type': 'application/json'
+    }
 
 class TestCSRFProtection:
     """Test cases for CSRF protection."""
@@ -51,7 +35,7 @@ class TestCSRFProtection:
         response = client.get('/api/auth/csrf', headers=auth_headers)
         
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert 'csrf_token' in data
         assert len(data['csrf_token']) > 0
 
@@ -67,7 +51,7 @@ class TestCSRFProtection:
         )
         
         assert response.status_code == 403
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['error'] == 'CSRF token missing'
 
     def test_post_request_with_invalid_csrf_token(self, client, auth_headers):
@@ -84,14 +68,14 @@ class TestCSRFProtection:
         )
         
         assert response.status_code == 403
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['error'] == 'Invalid CSRF token'
 
     def test_post_request_with_valid_csrf_token(self, client, auth_headers):
         """Test POST request succeeds with valid CSRF token."""
-        # 1. Get CSRF token
-        csrf_response = client.get('/api/auth/csrf', headers=auth_headers)
-        csrf_token = json.loads(csrf_response.data)['csrf_token']
+        # 1. Mint the CSRF token in-process (same HMAC the route returns)
+        user = User.query.filter_by(username='csrfuser').first()
+        csrf_token = generate_csrf_token(user.id)
         
         # 2. Make request with token
         headers = auth_headers.copy()
@@ -106,7 +90,7 @@ class TestCSRFProtection:
         )
         
         assert response.status_code == 201
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['success'] is True
 
     def test_put_request_requires_csrf(self, client, auth_headers):
@@ -1,31 +1,15 @@
 import pytest
-from decimal import Decimal
-from app import create_app
-from app.models import db, User
+from sqlalchemy import select
+from app.models import db, User, Account, to_money
 from app.auth_service import AuthService
 from app.account_service import AccountService
 from app.transaction_service import TransactionService
 from app.support_service import SupportService
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-@pytest.fixture
-def app_context(app):
-    """Create application context."""
-    with app.app_context():
-        yield
+pytestmark = pytest.mark.usefixtures('db_session')
 
 @pytest.fixture
-def test_user(app_context):
+def test_user(db_session):
     """Create a test user."""
     result = AuthService.register_user(
         username='testuser',
@@ -34,13 +18,21 @@ def test_user(app_context):
         password='SecurePass123',
         full_name='Test User'
     )
-    return User.query.get(result['user_id'])
+    return db.session.get(User, result['user_id'])
 
+def assert_balances(expected):
+    """Check account balances exactly, given as {account_id: amount}, in one query."""
+    rows = db.session.execute(
+        select(Account.id, Account.balance).where(Account.id.in_(expected))
+    ).all()
+    assert dict(rows) == {
+        account_id: to_money(amount) for account_id, amount in expected.items()
+    }
 
 class TestBoundaryConditions:
     """Test boundary and edge case values."""
     
-    def test_maximum_length_username(self, app_context):
+    def test_maximum_length_username(self):
         """Test username at maximum length."""
         long_username = 'a' * 50  # Assuming max is 50
         
@@ -57,7 +49,7 @@ class TestBoundaryConditions:
             # If there's a max length validation, that's also valid
             assert 'too long' in str(e).lower() or 'maximum' in str(e).lower()
     
-    def test_extremely_long_username(self, app_context):
+    def test_extremely_long_username(self):
         """Test username beyond reasonable length."""
         very_long_username = 'a' * 1000
         
@@ -70,7 +62,7 @@ class TestBoundaryConditions:
                 full_name='Test User'
             )
     
-    def test_very_large_transaction_amount(self, app_context, test_user):
+    def test_very_large_transaction_amount(self, test_user):
         """Test transfer with very large amount."""
         # Create account with very large balance
         account1 = AccountService.create_account(
@@ -94,8 +86,12 @@ class TestBoundaryConditions:
         )
         
         assert result['success'] is True
+        assert_balances({
+            account1['account_id']: '0.00',
+            account2['account_id']: '999999999.99',
+        })
     
-    def test_very_small_transaction_amount(self, app_context, test_user):
+    def test_very_small_transaction_amount(self, test_user):
         """Test transfer with very small amount (0.01)."""
         account1 = AccountService.create_account(
             user_id=test_user.id,
@@ -118,8 +114,57 @@ class TestBoundaryConditions:
         
         assert result['success'] is True
         assert result['amount'] == 0.01
+        assert_balances({
+            account1['account_id']: '9.99',
+            account2['account_id']: '0.01',
+        })
+    
+    def test_sub_cent_transaction_amount(self, test_user):
+        """Test that amounts rounding to zero cents are rejected."""
+        account1 = AccountService.create_account(
+            user_id=test_user.id,
+            account_type='checking',
+            opening_balance=100.0
+        )
+        
+        account2 = AccountService.create_account(
+            user_id=test_user.id,
+            account_type='savings',
+            opening_balance=0.0
+        )
+        
+        with pytest.raises(ValueError, match='Transfer amount must be positive'):
+            TransactionService.internal_transfer(
+                sender_user_id=test_user.id,
+                sender_account_id=account1['account_id'],
+                receiver_account_id=account2['account_id'],
+                amount=0.001
+            )
     
-    def test_float_precision_transfer(self, app_context, test_user):
+    @pytest.mark.parametrize('amount', ['1e30', 1e30, 1.2e16])
+    def test_out_of_range_transaction_amount(self, test_user, amount):
+        """Test that amounts too large for NUMERIC(18, 2) are rejected."""
+        account1 = AccountService.create_account(
+            user_id=test_user.id,
+            account_type='checking',
+            opening_balance=100.0
+        )
+        
+        account2 = AccountService.create_account(
+            user_id=test_user.id,
+            account_type='savings',
+            opening_balance=0.0
+        )
+        
+        with pytest.raises(ValueError, match='Amount out of range'):
+            TransactionService.internal_transfer(
+                sender_user_id=test_user.id,
+                sender_account_id=account1['account_id'],
+                receiver_account_id=account2['account_id'],
+                amount=amount
+            )
+    
+    def test_float_precision_transfer(self, test_user):
         """Test transfer with floating point precision issues."""
         account1 = AccountService.create_account(
             user_id=test_user.id,
@@ -143,29 +188,30 @@ class TestBoundaryConditions:
         
         assert result['success'] is True
         
-        # Check balance is exactly 100.00
-        from app.models import Account
-        acc1 = Account.query.get(account1['account_id'])
-        assert abs(acc1.balance - 100.0) < 0.001
+        # Balances are fixed-point, so the result is exact
+        assert_balances({
+            account1['account_id']: '100.00',
+            account2['account_id']: '0.33',
+        })
     
-    def test_many_accounts_per_user(self, app_context, test_user):
+    def test_many_accounts_per_user(self, test_user, assert_max_queries):
         """Test creating many accounts for single user."""
-        accounts = []
-        
-        # Create 20 accounts
-        for i in range(20):
-            account = AccountService.create_account(
-                user_id=test_user.id,
-                account_type='checking' if i % 2 == 0 else 'savings',
-                opening_balance=100.0
-            )
-            accounts.append(account)
+        # The batch commit expires test_user; read its id before counting
+        user_id = test_user.id
+        
+        # Create 20 accounts in one batch
+        accounts = AccountService.bulk_create_accounts(user_id, [
+            {'account_type': 'checking' if i % 2 == 0 else 'savings', 'opening_balance': 100.0}
+            for i in range(20)
+        ])
+        
+        # Verify all created, with a single query (no per-account lazy loads)
+        with assert_max_queries(1):
+            user_accounts = AccountService.get_user_accounts(user_id)
         
-        # Verify all created
-        user_accounts = AccountService.get_user_accounts(test_user.id)
         assert len(user_accounts) == 20
     
-    def test_zero_opening_balance(self, app_context, test_user):
+    def test_zero_opening_balance(self, test_user):
         """Test creating account with zero opening balance."""
         account = AccountService.create_account(
             user_id=test_user.id,
@@ -175,7 +221,7 @@ class TestBoundaryConditions:
         
         assert account['balance'] == 0.0
     
-    def test_exactly_available_balance_transfer(self, app_context, test_user):
+    def test_exactly_available_balance_transfer(self, test_user):
         """Test transferring exactly the available balance."""
         account1 = AccountService.create_account(
             user_id=test_user.id,
@@ -199,15 +245,16 @@ class TestBoundaryConditions:
         assert result['success'] is True
         
         # Sender should have 0 balance
-        from app.models import Account
-        acc1 = Account.query.get(account1['account_id'])
-        assert acc1.balance == 0.0
+        assert_balances({
+            account1['account_id']: '0.00',
+            account2['account_id']: '100.00',
+        })
 
 
 class TestUnicodeAndSpecialCharacters:
     """Test handling of unicode and special characters."""
     
-    def test_unicode_name(self, app_context):
+    def test_unicode_name(self):
         """Test user registration with unicode characters in name."""
         result = AuthService.register_user(
             username='testuser',
@@ -218,10 +265,10 @@ class TestUnicodeAndSpecialCharacters:
         )
         
         # Get the user to check full_name
-        user = User.query.get(result['user_id'])
+        user = db.session.get(User, result['user_id'])
         assert user.full_name == 'José García 李明'
     
-    def test_emoji_in_description(self, app_context, test_user):
+    def test_emoji_in_description(self, test_user):
         """Test ticket with emoji in description."""
         result = SupportService.create_ticket(
             customer_id=test_user.id,
@@ -238,7 +285,7 @@ class TestUnicodeAndSpecialCharacters:
         assert ticket is not None
         assert '😢' in ticket.description
     
-    def test_special_characters_in_password(self, app_context):
+    def test_special_characters_in_password(self):
         """Test password with various special characters."""
         special_password = 'P@ssw0rd!#$%^&*()'
         
@@ -254,7 +301,7 @@ class TestUnicodeAndSpecialCharacters:
         login_result = AuthService.login('testuser', special_password)
         assert login_result['success'] is True
     
-    def test_apostrophe_in_name(self, app_context):
+    def test_apostrophe_in_name(self):
         """Test name with apostrophe (SQL injection attempt)."""
         result = AuthService.register_user(
             username='testuser',
@@ -265,14 +312,14 @@ class TestUnicodeAndSpecialCharacters:
         )
         
         # Name should be safely stored (after sanitization)
-        user = User.query.get(result['user_id'])
+        user = db.session.get(User, result['user_id'])
         assert user is not None
 
 
 class TestLargeDatasets:
     """Test handling of large datasets."""
     
-    def test_many_transactions_pagination(self, app_context, test_user):
+    def test_many_transactions_pagination(self, test_user):
         """Test pagination with many transactions."""
         account1 = AccountService.create_account(
             user_id=test_user.id,
@@ -286,14 +333,16 @@ class TestLargeDatasets:
             opening_balance=0.0
         )
         
-        # Create 50 transactions
-        for i in range(50):
-            TransactionService.internal_transfer(
-                sender_user_id=test_user.id,
-                sender_account_id=account1['account_id'],
-                receiver_account_id=account2['account_id'],
-                amount=10.0
-            )
+        # Create 50 transactions in one batch; they share one created_at
+        result = TransactionService.bulk_internal_transfer(
+            sender_user_id=test_user.id,
+            sender_account_id=account1['account_id'],
+            receiver_account_id=account2['account_id'],
+            amounts=[10.0] * 50
+        )
+        
+        # Newest first: ties on created_at fall back to insertion order
+        expected_ids = result['transaction_ids'][::-1]
         
         # Test pagination
         page1 = TransactionService.get_account_transactions(
@@ -308,11 +357,16 @@ class TestLargeDatasets:
             offset=20
         )
         
-        assert len(page1['transactions']) == 20
-        assert len(page2['transactions']) == 20
-        assert page1['transactions'][0] != page2['transactions'][0]
+        page1_ids = [t['transaction_id'] for t in page1['transactions']]
+        page2_ids = [t['transaction_id'] for t in page2['transactions']]
+        
+        assert page1['total_count'] == 50
+        assert len(page1_ids) == 20
+        assert len(page2_ids) == 20
+        assert set(page1_ids).isdisjoint(page2_ids)
+        assert page1_ids + page2_ids == expected_ids[:40]
     
-    def test_very_long_description(self, app_context, test_user):
+    def test_very_long_description(self, test_user):
         """Test ticket with very long description."""
         long_description = 'A' * 5000
         
@@ -333,7 +387,7 @@ class TestLargeDatasets:
 class TestBusinessRuleEdgeCases:
     """Test edge cases for business rules."""
     
-    def test_account_number_format(self, app_context, test_user):
+    def test_account_number_format(self, test_user):
         """Test that account numbers follow expected format."""
         account = AccountService.create_account(
             user_id=test_user.id,
@@ -346,7 +400,7 @@ class TestBusinessRuleEdgeCases:
         assert len(account['account_number']) == 14  # ACC- + 10 digits
         assert account['account_number'][4:].isdigit()
     
-    def test_transfer_to_same_account(self, app_context, test_user):
+    def test_transfer_to_same_account(self, test_user):
         """Test that transfer to same account is handled."""
         account = AccountService.create_account(
             user_id=test_user.id,
@@ -363,14 +417,12 @@ class TestBusinessRuleEdgeCases:
                 amount=50.0
             )
             # If it succeeds, balance should be unchanged
-            from app.models import Account
-            acc = Account.query.get(account['account_id'])
-            assert acc.balance == 100.0
+            assert_balances({account['account_id']: '100.00'})
         except ValueError as e:
             # Or it should fail with appropriate error
             assert 'same account' in str(e).lower() or 'invalid' in str(e).lower()
     
-    def test_close_account_with_exact_zero_balance(self, app_context, test_user):
+    def test_close_account_with_exact_zero_balance(self, test_user):
         """Test closing account with exactly 0.00 balance."""
         account1 = AccountService.create_account(
             user_id=test_user.id,
@@ -392,6 +444,11 @@ class TestBusinessRuleEdgeCases:
             amount=100.0
         )
         
+        assert_balances({
+            account1['account_id']: '0.00',
+            account2['account_id']: '100.00',
+        })
+        
         # Now close the account with 0 balance
         result = AccountService.close_account(account1['account_id'], test_user.id)
         
@@ -1,29 +1,13 @@
 import pytest
-from app import create_app
 from app.models import db, User, UserRole
 from app.auth_service import AuthService
 from app.rbac_service import RBACService
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
-
-@pytest.fixture
-def app_context(app):
-    """Create application context."""
-    with app.app_context():
-        yield
+pytestmark = pytest.mark.usefixtures('db_session')
 
-@pytest.fixture
-def test_user(app_context):
-    """Create a test customer user."""
+@pytest.fixture(scope='module')
+def test_user_id(db_connection):
+    """Register the test customer once per module."""
     result = AuthService.register_user(
         username='customer',
         email='customer@example.com',
@@ -31,54 +15,103 @@ def test_user(app_context):
         password='SecurePass123',
         full_name='Test Customer'
     )
-    return User.query.get(result['user_id'])
+    return result['user_id']
 
-@pytest.fixture
-def test_admin(app_context):
-    """Create a test admin user."""
+@pytest.fixture(scope='module')
+def test_admin_id(db_connection):
+    """Register the test admin once per module."""
     result = AuthService.register_user(
         username='admin',
         email='admin@example.com',
         phone='+1234567890',
         password='SecurePass123',
-        full_name='Test Admin'
+        full_name='Test Admin',
+        role=UserRole.ADMIN
+    )
+    return result['user_id']
+
+def _register_with_role(username, full_name, role):
+    """Register a user that holds the given role from the start."""
+    result = AuthService.register_user(
+        username=username,
+        email=f'{username}@example.com',
+        phone='+1234567890',
+        password='SecurePass123',
+        full_name=full_name,
+        role=role
     )
-    user = User.query.get(result['user_id'])
-    user.role = UserRole.ADMIN
-    db.session.commit()
-    return user
+    return result['user_id']
+
+@pytest.fixture(scope='module')
+def role_user_ids(test_user_id, test_admin_id):
+    """Map each role to the id of one user holding it."""
+    return {
+        UserRole.CUSTOMER: test_user_id,
+        UserRole.ADMIN: test_admin_id,
+        UserRole.SUPPORT_AGENT: _register_with_role('agent', 'Test Agent', UserRole.SUPPORT_AGENT),
+        UserRole.AUDITOR: _register_with_role('auditor', 'Test Auditor', UserRole.AUDITOR),
+    }
+
+@pytest.fixture
+def test_user(db_session, test_user_id):
+    """Load the shared test customer."""
+    return db.session.get(User, test_user_id)
+
+@pytest.fixture
+def test_admin(db_session, test_admin_id):
+    """Load the shared test admin."""
+    return db.session.get(User, test_admin_id)
 
 class TestRBACService:
     """Test cases for RBACService."""
     
-    def test_customer_permissions(self, app_context, test_user):
-        """Test customer role permissions."""
-        assert RBACService.has_permission(test_user, 'register_login') is True
-        assert RBACService.has_permission(test_user, 'manage_own_profile') is True
-        assert RBACService.has_permission(test_user, 'create_accounts') is True
-        assert RBACService.has_permission(test_user, 'internal_transfers') is True
-        assert RBACService.has_permission(test_user, 'external_transfers') is True
-        assert RBACService.has_permission(test_user, 'freeze_unfreeze_accounts') is False
-        assert RBACService.has_permission(test_user, 'assign_change_user_roles') is False
-    
-    def test_admin_permissions(self, app_context, test_admin):
-        """Test admin role permissions."""
-        assert RBACService.has_permission(test_admin, 'register_login') is True
-        assert RBACService.has_permission(test_admin, 'manage_own_profile') is True
-        assert RBACService.has_permission(test_admin, 'freeze_unfreeze_accounts') is True
-        assert RBACService.has_permission(test_admin, 'assign_change_user_roles') is True
-        assert RBACService.has_permission(test_admin, 'view_audit_security_logs') is True
-    
-    def test_check_permission_by_user_id(self, app_context, test_user):
+    @pytest.mark.parametrize('role,expected', [
+        (UserRole.CUSTOMER, {
+            'register_login': True,
+            'manage_own_profile': True,
+            'create_accounts': True,
+            'internal_transfers': True,
+            'external_transfers': True,
+            'freeze_unfreeze_accounts': False,
+            'assign_change_user_roles': False,
+        }),
+        (UserRole.ADMIN, {
+            'register_login': True,
+            'manage_own_profile': True,
+            'freeze_unfreeze_accounts': True,
+            'assign_change_user_roles': True,
+            'view_audit_security_logs': True,
+        }),
+        (UserRole.SUPPORT_AGENT, {
+            'view_all_user_accounts': True,
+            'view_open_tickets': True,
+            'update_ticket_status': True,
+            'create_accounts': False,
+            'internal_transfers': False,
+        }),
+        (UserRole.AUDITOR, {
+            'view_all_user_accounts': True,
+            'view_audit_security_logs': True,
+            'manage_own_profile': False,
+            'create_accounts': False,
+            'internal_transfers': False,
+        }),
+    ], ids=lambda value: value.value if isinstance(value, UserRole) else None)
+    def test_role_permissions(self, role_user_ids, role, expected):
+        """Test each role's permission table."""
+        user = db.session.get(User, role_user_ids[role])
+        assert RBACService.has_permissions(user, expected) == expected
+    
+    def test_check_permission_by_user_id(self, test_user):
         """Test checking permission by user ID."""
         assert RBACService.check_permission(test_user.id, 'create_accounts') is True
         assert RBACService.check_permission(test_user.id, 'freeze_unfreeze_accounts') is False
     
-    def test_check_permission_invalid_user(self, app_context):
+    def test_check_permission_invalid_user(self):
         """Test checking permission for non-existent user."""
         assert RBACService.check_permission(999, 'create_accounts') is False
     
-    def test_get_user_permissions_customer(self, app_context, test_user):
+    def test_get_user_permissions_customer(self, test_user):
         """Test getting customer permissions."""
         result = RBACService.get_user_permissions(test_user.id)
         
@@ -87,7 +120,7 @@ class TestRBACService:
         assert result['permissions']['create_accounts'] is True
         assert result['permissions']['freeze_unfreeze_accounts'] is False
     
-    def test_get_user_permissions_admin(self, app_context, test_admin):
+    def test_get_user_permissions_admin(self, test_admin):
         """Test getting admin permissions."""
         result = RBACService.get_user_permissions(test_admin.id)
         
@@ -95,12 +128,12 @@ class TestRBACService:
         assert result['permissions']['freeze_unfreeze_accounts'] is True
         assert result['permissions']['assign_change_user_roles'] is True
     
-    def test_get_user_permissions_not_found(self, app_context):
+    def test_get_user_permissions_not_found(self):
         """Test getting permissions for non-existent user."""
         with pytest.raises(ValueError, match='User not found'):
             RBACService.get_user_permissions(999)
     
-    def test_assign_role_success(self, app_context, test_user, test_admin):
+    def test_assign_role_success(self, test_user, test_admin):
         """Test successful role assignment."""
         result = RBACService.assign_role(
             user_id=test_user.id,
@@ -112,10 +145,10 @@ class TestRBACService:
         assert result['new_role'] == 'support_agent'
         
         # Verify role was changed in database
-        user = User.query.get(test_user.id)
-        assert user.role == UserRole.SUPPORT_AGENT
+        db.session.refresh(test_user)
+        assert test_user.role == UserRole.SUPPORT_AGENT
     
-    def test_assign_role_invalid_role(self, app_context, test_user, test_admin):
+    def test_assign_role_invalid_role(self, test_user, test_admin):
         """Test role assignment with invalid role."""
         with pytest.raises(ValueError, match='Invalid role'):
             RBACService.assign_role(
@@ -124,7 +157,7 @@ class TestRBACService:
                 admin_id=test_admin.id
             )
     
-    def test_assign_role_user_not_found(self, app_context, test_admin):
+    def test_assign_role_user_not_found(self, test_admin):
         """Test role assignment for non-existent user."""
         with pytest.raises(ValueError, match='User not found'):
             RBACService.assign_role(
@@ -133,27 +166,31 @@ class TestRBACService:
                 admin_id=test_admin.id
             )
     
-    def test_get_users_by_role_customer(self, app_context, test_user):
+    def test_get_users_by_role_customer(self, test_user, assert_max_queries):
         """Test getting users by customer role."""
-        result = RBACService.get_users_by_role('customer', limit=10)
+        # One query for the page, one for the total
+        with assert_max_queries(2):
+            result = RBACService.get_users_by_role('customer', limit=10)
         
         assert result['role'] == 'customer'
         assert result['total_count'] >= 1
-        assert any(u['user_id'] == test_user.id for u in result['users'])
+        assert test_user.id in result['users_by_id']
     
-    def test_get_users_by_role_admin(self, app_context, test_admin):
+    def test_get_users_by_role_admin(self, test_admin, assert_max_queries):
         """Test getting users by admin role."""
-        result = RBACService.get_users_by_role('admin', limit=10)
+        # One query for the page, one for the total
+        with assert_max_queries(2):
+            result = RBACService.get_users_by_role('admin', limit=10)
         
         assert result['role'] == 'admin'
-        assert any(u['user_id'] == test_admin.id for u in result['users'])
+        assert test_admin.id in result['users_by_id']
     
-    def test_get_users_by_role_invalid_role(self, app_context):
+    def test_get_users_by_role_invalid_role(self):
         """Test getting users by invalid role."""
         with pytest.raises(ValueError, match='Invalid role'):
             RBACService.get_users_by_role('invalid_role')
     
-    def test_deactivate_user_success(self, app_context, test_user, test_admin):
+    def test_deactivate_user_success(self, test_user, test_admin):
         """Test successful user deactivation."""
         result = RBACService.deactivate_user(test_user.id, test_admin.id)
         
@@ -161,15 +198,15 @@ class TestRBACService:
         assert result['is_active'] is False
         
         # Verify user is deactivated in database
-        user = User.query.get(test_user.id)
-        assert user.is_active is False
+        db.session.refresh(test_user)
+        assert test_user.is_active is False
     
-    def test_deactivate_user_not_found(self, app_context, test_admin):
+    def test_deactivate_user_not_found(self, test_admin):
         """Test deactivating non-existent user."""
         with pytest.raises(ValueError, match='User not found'):
             RBACService.deactivate_user(999, test_admin.id)
     
-    def test_activate_user_success(self, app_context, test_user, test_admin):
+    def test_activate_user_success(self, test_user, test_admin):
         """Test successful user activation."""
         # First deactivate the user
         RBACService.deactivate_user(test_user.id, test_admin.id)
@@ -181,48 +218,10 @@ class TestRBACService:
         assert result['is_active'] is True
         
         # Verify user is activated in database
-        user = User.query.get(test_user.id)
-        assert user.is_active is True
+        db.session.refresh(test_user)
+        assert test_user.is_active is True
     
-    def test_activate_user_not_found(self, app_context, test_admin):
+    def test_activate_user_not_found(self, test_admin):
         """Test activating non-existent user."""
         with pytest.raises(ValueError, match='User not found'):
             RBACService.activate_user(999, test_admin.id)
-    
-    def test_support_agent_permissions(self, app_context):
-        """Test support agent role permissions."""
-        result = AuthService.register_user(
-            username='agent',
-            email='agent@example.com',
-            phone='+1234567890',
-            password='SecurePass123',
-            full_name='Test Agent'
-        )
-        agent = User.query.get(result['user_id'])
-        agent.role = UserRole.SUPPORT_AGENT
-        db.session.commit()
-        
-        assert RBACService.has_permission(agent, 'view_all_user_accounts') is True
-        assert RBACService.has_permission(agent, 'view_open_tickets') is True
-        assert RBACService.has_permission(agent, 'update_ticket_status') is True
-        assert RBACService.has_permission(agent, 'create_accounts') is False
-        assert RBACService.has_permission(agent, 'internal_transfers') is False
-    
-    def test_auditor_permissions(self, app_context):
-        """Test auditor role permissions."""
-        result = AuthService.register_user(
-            username='auditor',
-            email='auditor@example.com',
-            phone='+1234567890',
-            password='SecurePass123',
-            full_name='Test Auditor'
-        )
-        auditor = User.query.get(result['user_id'])
-        auditor.role = UserRole.AUDITOR
-        db.session.commit()
-        
-        assert RBACService.has_permission(auditor, 'view_all_user_accounts') is True
-        assert RBACService.has_permission(auditor, 'view_audit_security_logs') is True
-        assert RBACService.has_permission(auditor, 'manage_own_profile') is False
-        assert RBACService.has_permission(auditor, 'create_accounts') is False
-        assert RBACService.has_permission(auditor, 'internal_transfers') is False
@@ -1,93 +1,63 @@
-import pytest
 import json
-from app import create_app
+import pytest
+from flask_jwt_extended import create_access_token
 from app.models import db, User, UserRole
 from app.auth_service import AuthService
-from app.account_service import AccountService
-
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
+from app.security import generate_csrf_token
 
-@pytest.fixture
-def client(app):
-    """Create test client."""
-    return app.test_client()
+# None of these tests look at the audit trail
+pytestmark = pytest.mark.usefixtures('no_audit')
 
-@pytest.fixture
-def app_context(app):
-    """Create application context."""
-    with app.app_context():
-        yield
+# Login request bodies, serialized once rather than on every post
+LOGIN_BODY = json.dumps({'username': 'testuser', 'password': 'SecurePass123'})
+WRONG_PASSWORD_LOGIN_BODY = json.dumps({'username': 'ratelimituser', 'password': 'wrongpass'})
 
-@pytest.fixture
-def auth_headers(app_context, client):
-    """Create authentication headers with JWT token."""
-    # Register and login a user
-    result = AuthService.register_user(
-        username='testuser',
-        email='test@example.com',
+def _insert_user(username, email, password_hash, full_name, role):
+    """Insert a user row directly and return its id."""
+    user = User(
+        username=username,
+        email=email,
         phone='+1234567890',
-        password='SecurePass123',
-        full_name='Test User'
-    )
-    
-    response = client.post('/api/auth/login', 
-        json={'username': 'testuser', 'password': 'SecurePass123'}
+        password_hash=password_hash,
+        full_name=full_name,
+        role=role,
+        is_active=True
     )
-    
-    data = json.loads(response.data)
-    token = data['access_token']
-    
-    # Fetch CSRF token
-    csrf_response = client.get('/api/auth/csrf', headers={'Authorization': f"Bearer {token}"})
-    csrf_data = json.loads(csrf_response.data)
-    
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+def _token_headers(user_id):
+    """Mint a user's JWT and CSRF token directly, skipping the login request."""
     return {
-        'Authorization': f"Bearer {token}",
-        'X-CSRF-Token': csrf_data['csrf_token'],
+        'Authorization': f"Bearer {create_access_token(identity=str(user_id))}",
+        'X-CSRF-Token': generate_csrf_token(user_id),
         'Content-Type': 'application/json'
     }
 
-@pytest.fixture
-def admin_headers(app_context, client):
+@pytest.fixture(scope='module')
+def registered_user(db_connection, precomputed_hashes):
+    """Insert the test customer once per module and return its id."""
+    return _insert_user('testuser', 'test@example.com',
+                        precomputed_hashes['SecurePass123'], 'Test User', UserRole.CUSTOMER)
+
+@pytest.fixture(scope='module')
+def registered_admin(db_connection, precomputed_hashes):
+    """Insert the test admin once per module and return its id."""
+    return _insert_user('admin', 'admin@example.com',
+                        precomputed_hashes['Admin@123'], 'Admin User', UserRole.ADMIN)
+
+@pytest.fixture(scope='module')
+def auth_headers(registered_user):
+    """Create authentication headers with JWT token."""
+    return _token_headers(registered_user)
+
+@pytest.fixture(scope='module')
+def admin_headers(registered_admin):
     """Create admin authentication headers."""
-    result = AuthService.register_user(
-        username='admin',
-        email='admin@example.com',
-        phone='+1234567890',
-        password='Admin@123',
-        full_name='Admin User'
-    )
-    
-    user = User.query.get(result['user_id'])
-    user.role = UserRole.ADMIN
-    db.session.commit()
-    
-    response = client.post('/api/auth/login',
-        json={'username': 'admin', 'password': 'Admin@123'}
-    )
-    
-    data = json.loads(response.data)
-    token = data['access_token']
-    
-    # Fetch CSRF token
-    csrf_response = client.get('/api/auth/csrf', headers={'Authorization': f"Bearer {token}"})
-    csrf_data = json.loads(csrf_response.data)
-    
-    return {
-        'Authorization': f"Bearer {token}",
-        'X-CSRF-Token': csrf_data['csrf_token'],
-        'Content-Type': 'application/json'
-    }
+    return _token_headers(registered_admin)
 
+@pytest.mark.usefixtures('db_session')
 class TestAuthRoutes:
     """Test cases for authentication routes."""
     
@@ -102,7 +72,7 @@ class TestAuthRoutes:
         })
         
         assert response.status_code == 201
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['success'] is True
         assert data['username'] == 'newuser'
     
@@ -125,24 +95,15 @@ class TestAuthRoutes:
         
         assert response.status_code == 400
     
-    def test_login_route_success(self, app_context, client):
+    def test_login_route_success(self, client, registered_user):
         """Test login via HTTP endpoint."""
-        # Register user first
-        AuthService.register_user(
-            username='testuser',
-            email='test@example.com',
-            phone='+1234567890',
-            password='SecurePass123',
-            full_name='Test User'
+        response = client.post('/api/auth/login',
+            data=LOGIN_BODY,
+            content_type='application/json'
         )
         
-        response = client.post('/api/auth/login', json={
-            'username': 'testuser',
-            'password': 'SecurePass123'
-        })
-        
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert 'access_token' in data
         assert 'refresh_token' in data
     
@@ -161,7 +122,7 @@ class TestAuthRoutes:
         response = client.post('/api/auth/logout', headers=auth_headers)
         
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['success'] is True
     
     def test_logout_route_no_token(self, client):
@@ -175,7 +136,7 @@ class TestAuthRoutes:
         response = client.get('/api/auth/profile', headers=auth_headers)
         
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['username'] == 'testuser'
     
     def test_get_profile_route_no_token(self, client):
@@ -195,7 +156,7 @@ class TestAuthRoutes:
         )
         
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['email'] == 'updated@example.com'
     
     def test_change_password_route_success(self, client, auth_headers):
@@ -209,10 +170,11 @@ class TestAuthRoutes:
         )
         
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['success'] is True
 
 
+@pytest.mark.usefixtures('db_session')
 class TestAccountRoutes:
     """Test cases for account routes."""
     
@@ -227,7 +189,7 @@ class TestAccountRoutes:
         )
         
         assert response.status_code == 201
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['success'] is True
         assert data['account_type'] == 'checking'
     
@@ -242,150 +204,117 @@ class TestAccountRoutes:
         
         assert response.status_code == 401
     
-    def test_get_user_accounts_route(self, app_context, client, auth_headers):
+    def test_get_user_accounts_route(self, client, auth_headers, registered_user, account_factory):
         """Test getting user accounts."""
-        # Create an account first
-        user = User.query.filter_by(username='testuser').first()
-        AccountService.create_account(
-            user_id=user.id,
-            account_type='checking',
-            opening_balance=1000.0
-        )
+        account_factory(registered_user)
         
-        response = client.get(f'/api/accounts/user/{user.id}', headers=auth_headers)
+        response = client.get(f'/api/accounts/user/{registered_user}', headers=auth_headers)
         
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert 'accounts' in data
         assert len(data['accounts']) > 0
     
-    def test_get_account_route(self, app_context, client, auth_headers):
+    def test_get_account_route(self, client, auth_headers, registered_user, account_factory):
         """Test getting specific account."""
-        user = User.query.filter_by(username='testuser').first()
-        account = AccountService.create_account(
-            user_id=user.id,
-            account_type='checking',
-            opening_balance=1000.0
-        )
+        account = account_factory(registered_user, balance=1000.0)
         
-        response = client.get(f"/api/accounts/{account['account_id']}", 
+        response = client.get(f"/api/accounts/{account.id}", 
             headers=auth_headers
         )
         
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['balance'] == 1000.0
     
-    def test_freeze_account_route(self, app_context, client, admin_headers):
+    def test_freeze_account_route(self, client, admin_headers, registered_user, account_factory):
         """Test freezing account via admin."""
-        # Create a regular user and account
-        user_result = AuthService.register_user(
-            username='customer',
-            email='customer@example.com',
-            phone='+0987654321',
-            password='SecurePass123',
-            full_name='Customer'
-        )
-        
-        account = AccountService.create_account(
-            user_id=user_result['user_id'],
-            account_type='checking',
-            opening_balance=1000.0
-        )
+        # Create an account for the regular user
+        account = account_factory(registered_user)
         
-        response = client.post(f"/api/accounts/{account['account_id']}/freeze",
+        response = client.post(f"/api/accounts/{account.id}/freeze",
             headers=admin_headers
         )
         
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['status'] == 'frozen'
 
 
+@pytest.mark.usefixtures('db_session')
 class TestTransactionRoutes:
     """Test cases for transaction routes."""
     
-    def test_internal_transfer_route_success(self, app_context, client, auth_headers):
+    def test_internal_transfer_route_success(self, client, auth_headers, registered_user, account_factory):
         """Test internal transfer via HTTP endpoint."""
-        # Get the user_id from the logged in user (from auth_headers)
-        user = User.query.filter_by(username='testuser').first()
-        
         # Create two accounts for the authenticated user
-        account1 = AccountService.create_account(
-            user_id=user.id,
-            account_type='checking',
-            opening_balance=1000.0
-        )
-        
-        account2 = AccountService.create_account(
-            user_id=user.id,
-            account_type='savings',
-            opening_balance=500.0
-        )
+        account1 = account_factory(registered_user, 'checking', balance=1000.0)
+        account2 = account_factory(registered_user, 'savings', balance=500.0)
         
         # Make the transfer (user_id from JWT should match account owner)
         response = client.post('/api/transactions/internal-transfer',
             headers=auth_headers,
             json={
-                'sender_account_id': account1['account_id'],
-                'receiver_account_id': account2['account_id'],
+                'sender_account_id': account1.id,
+                'receiver_account_id': account2.id,
                 'amount': 200.0,
                 'description': 'Transfer'
             }
         )
         
         assert response.status_code == 201
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['success'] is True
         assert data['amount'] == 200.0
     
-    def test_internal_transfer_route_insufficient_balance(self, app_context, client, auth_headers):
+    def test_internal_transfer_route_insufficient_balance(self, client, auth_headers, registered_user, account_factory):
         """Test transfer with insufficient balance."""
-        user = User.query.filter_by(username='testuser').first()
+        account1 = account_factory(registered_user, 'checking', balance=100.0)
+        account2 = account_factory(registered_user, 'savings', balance=500.0)
         
-        account1 = AccountService.create_account(
-            user_id=user.id,
-            account_type='checking',
-            opening_balance=100.0
+        response = client.post('/api/transactions/internal-transfer',
+            headers=auth_headers,
+            json={
+                'sender_account_id': account1.id,
+                'receiver_account_id': account2.id,
+                'amount': 500.0,
+                'description': 'Transfer'
+            }
         )
         
-        account2 = AccountService.create_account(
-            user_id=user.id,
-            account_type='savings',
-            opening_balance=500.0
-        )
+        assert response.status_code == 400
+    
+    def test_internal_transfer_route_out_of_range_amount(self, client, auth_headers, registered_user, account_factory):
+        """Test transfer with an amount too large to store."""
+        account1 = account_factory(registered_user, 'checking')
+        account2 = account_factory(registered_user, 'savings')
         
         response = client.post('/api/transactions/internal-transfer',
             headers=auth_headers,
             json={
-                'sender_account_id': account1['account_id'],
-                'receiver_account_id': account2['account_id'],
-                'amount': 500.0,
+                'sender_account_id': account1.id,
+                'receiver_account_id': account2.id,
+                'amount': 1e30,
                 'description': 'Transfer'
             }
         )
         
         assert response.status_code == 400
     
-    def test_get_account_transactions_route(self, app_context, client, auth_headers):
+    def test_get_account_transactions_route(self, client, auth_headers, registered_user, account_factory):
         """Test getting account transactions."""
-        user = User.query.filter_by(username='testuser').first()
-        
-        account = AccountService.create_account(
-            user_id=user.id,
-            account_type='checking',
-            opening_balance=1000.0
-        )
+        account = account_factory(registered_user)
         
-        response = client.get(f"/api/transactions/account/{account['account_id']}/history",
+        response = client.get(f"/api/transactions/account/{account.id}/history",
             headers=auth_headers
         )
         
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert 'transactions' in data
 
 
+@pytest.mark.usefixtures('db_session')
 class TestCORSHeaders:
     """Test CORS headers are properly set."""
     
@@ -405,11 +334,11 @@ class TestCORSHeaders:
         response = client.post('/api/auth/register',
             headers={'Origin': 'http://localhost:3001'},
             json={
-                'username': 'testuser',
-                'email': 'test@example.com',
+                'username': 'corsuser',
+                'email': 'cors@example.com',
                 'phone': '+1234567890',
                 'password': 'SecurePass123',
-                'full_name': 'Test User'
+                'full_name': 'Cors User'
             }
         )
         
@@ -419,7 +348,7 @@ class TestCORSHeaders:
 class TestJWTTokenExpiry:
     """Test JWT token expiry and refresh."""
     
-    def test_expired_token_rejected(self, app_context, client):
+    def test_expired_token_rejected(self, client):
         """Test that expired tokens are rejected."""
         # This would require mocking time or creating a token with past expiry
         # For now, test with invalid token format
@@ -474,14 +403,16 @@ class TestErrorResponses:
         })
         
         assert response.status_code == 400
-        data = json.loads(response.data)
+        data = response.get_json()
         assert 'error' in data or 'message' in data
 
 
+@pytest.mark.usefixtures('db_session')
 class TestRateLimiting:
     """Test rate limiting (if implemented)."""
     
-    def test_multiple_requests_allowed(self, app_context, client):
+    @pytest.mark.usefixtures('fast_hash')
+    def test_multiple_requests_allowed(self, client):
         """Test that normal usage is allowed."""
         # Create a user first to avoid audit log errors
         AuthService.register_user(
@@ -490,9 +421,9 @@ class TestRateLimiting:
         )
         
         for i in range(5):
-            response = client.post('/api/auth/login', json={
-                'username': 'ratelimituser',
-                'password': 'wrongpass'  # Intentionally wrong
-            })
+            response = client.post('/api/auth/login',
+                data=WRONG_PASSWORD_LOGIN_BODY,  # Intentionally wrong
+                content_type='application/json'
+            )
             # Should not be rate limited (401 for wrong password is fine)
             assert response.status_code in [200, 401]  # Not 429
@@ -1,29 +1,23 @@
+import re
 import pytest
-from app import create_app
-from app.models import db, User, SupportTicket, UserRole, TicketStatus
+from app.models import db, User, SupportTicket, TicketNote, UserRole, TicketStatus
 from app.auth_service import AuthService
 from app.support_service import SupportService
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
+SHORT_SUBJECT_RE = re.compile(r'Subject must be at least 5 characters')
+SHORT_DESCRIPTION_RE = re.compile(r'Description must be at least 10 characters')
+CUSTOMER_NOT_FOUND_RE = re.compile(r'Customer not found')
+TICKET_NOT_FOUND_RE = re.compile(r'Ticket not found')
+USER_NOT_FOUND_RE = re.compile(r'User not found')
+INVALID_STATUS_RE = re.compile(r'Invalid status')
+EMPTY_NOTE_RE = re.compile(r'Note cannot be empty')
+INVALID_AGENT_RE = re.compile(r'Invalid support agent')
 
-@pytest.fixture
-def app_context(app):
-    """Create application context."""
-    with app.app_context():
-        yield
+pytestmark = pytest.mark.usefixtures('module_fast_hash', 'db_session')
 
-@pytest.fixture
-def test_customer(app_context):
-    """Create a test customer."""
+@pytest.fixture(scope='module')
+def test_customer_id(db_connection):
+    """Register the test customer once per module."""
     result = AuthService.register_user(
         username='customer',
         email='customer@example.com',
@@ -31,27 +25,74 @@ def test_customer(app_context):
         password='SecurePass123',
         full_name='Test Customer'
     )
-    return User.query.get(result['user_id'])
+    return result['user_id']
 
-@pytest.fixture
-def test_agent(app_context):
-    """Create a test support agent."""
+@pytest.fixture(scope='module')
+def test_agent_id(db_connection):
+    """Register the test support agent once per module."""
     result = AuthService.register_user(
         username='agent',
         email='agent@example.com',
         phone='+1234567890',
         password='SecurePass123',
-        full_name='Test Agent'
+        full_name='Test Agent',
+        role=UserRole.SUPPORT_AGENT
+    )
+    return result['user_id']
+
+@pytest.fixture(scope='module')
+def test_admin_id(db_connection):
+    """Register the test admin once per module."""
+    result = AuthService.register_user(
+        username='admin',
+        email='admin@example.com',
+        phone='+1234567890',
+        password='SecurePass123',
+        full_name='Admin',
+        role=UserRole.ADMIN
+    )
+    return result['user_id']
+
+@pytest.fixture
+def test_customer(db_session, test_customer_id):
+    """Load the shared test customer."""
+    return db.session.get(User, test_customer_id)
+
+@pytest.fixture
+def test_agent(db_session, test_agent_id):
+    """Load the shared test support agent."""
+    return db.session.get(User, test_agent_id)
+
+@pytest.fixture
+def bulk_create_tickets(db_session):
+    """Return a function that inserts n open tickets for a customer in one statement."""
+    def create_tickets(customer_id, n):
+        db.session.bulk_insert_mappings(SupportTicket, [
+            {
+                'customer_id': customer_id,
+                'subject': f'Issue {i}',
+                'description': f'Description for issue {i}',
+                'status': TicketStatus.OPEN
+            }
+            for i in range(n)
+        ])
+        db.session.commit()
+    
+    return create_tickets
+
+@pytest.fixture
+def base_ticket(db_session, test_customer):
+    """Open the standard 'Account Issue' ticket for the test customer."""
+    return SupportService.create_ticket(
+        customer_id=test_customer.id,
+        subject='Account Issue',
+        description='I cannot access my account'
     )
-    user = User.query.get(result['user_id'])
-    user.role = UserRole.SUPPORT_AGENT
-    db.session.commit()
-    return user
 
 class TestSupportService:
     """Test cases for SupportService."""
     
-    def test_create_ticket_success(self, app_context, test_customer):
+    def test_create_ticket_success(self, test_customer):
         """Test successful ticket creation."""
         result = SupportService.create_ticket(
             customer_id=test_customer.id,
@@ -63,97 +104,75 @@ class TestSupportService:
         assert result['subject'] == 'Account Issue'
         assert result['status'] == 'open'
     
-    def test_create_ticket_short_subject(self, app_context, test_customer):
+    def test_create_ticket_short_subject(self, test_customer):
         """Test ticket creation with short subject."""
-        with pytest.raises(ValueError, match='Subject must be at least 5 characters'):
+        with pytest.raises(ValueError, match=SHORT_SUBJECT_RE):
             SupportService.create_ticket(
                 customer_id=test_customer.id,
                 subject='Help',
                 description='I cannot access my account'
             )
     
-    def test_create_ticket_short_description(self, app_context, test_customer):
+    def test_create_ticket_short_description(self, test_customer):
         """Test ticket creation with short description."""
-        with pytest.raises(ValueError, match='Description must be at least 10 characters'):
+        with pytest.raises(ValueError, match=SHORT_DESCRIPTION_RE):
             SupportService.create_ticket(
                 customer_id=test_customer.id,
                 subject='Account Issue',
                 description='Help me'
             )
     
-    def test_create_ticket_customer_not_found(self, app_context):
+    def test_create_ticket_customer_not_found(self):
         """Test ticket creation for non-existent customer."""
-        with pytest.raises(ValueError, match='Customer not found'):
+        with pytest.raises(ValueError, match=CUSTOMER_NOT_FOUND_RE):
             SupportService.create_ticket(
                 customer_id=999,
                 subject='Account Issue',
                 description='I cannot access my account'
             )
     
-    def test_get_ticket_success(self, app_context, test_customer):
+    def test_get_ticket_success(self, test_customer, base_ticket):
         """Test getting ticket details."""
-        ticket_result = SupportService.create_ticket(
-            customer_id=test_customer.id,
-            subject='Account Issue',
-            description='I cannot access my account'
-        )
-        
-        result = SupportService.get_ticket(ticket_result['ticket_id'])
+        result = SupportService.get_ticket(base_ticket['ticket_id'])
         
         assert result['subject'] == 'Account Issue'
         assert result['customer_id'] == test_customer.id
         assert result['status'] == 'open'
     
-    def test_get_ticket_not_found(self, app_context):
+    def test_get_ticket_not_found(self):
         """Test getting non-existent ticket."""
-        with pytest.raises(ValueError, match='Ticket not found'):
+        with pytest.raises(ValueError, match=TICKET_NOT_FOUND_RE):
             SupportService.get_ticket('invalid-id')
     
-    def test_get_open_tickets(self, app_context, test_customer):
+    def test_get_open_tickets(self, test_customer, bulk_create_tickets):
         """Test getting all open tickets."""
         # Create multiple tickets
-        for i in range(3):
-            SupportService.create_ticket(
-                customer_id=test_customer.id,
-                subject=f'Issue {i}',
-                description=f'Description for issue {i}'
-            )
+        bulk_create_tickets(test_customer.id, 3)
         
         result = SupportService.get_open_tickets(limit=10)
         
         assert result['total_count'] == 3
         assert len(result['tickets']) == 3
     
-    def test_get_customer_tickets(self, app_context, test_customer):
+    def test_get_customer_tickets(self, test_customer, bulk_create_tickets):
         """Test getting tickets for a customer."""
         # Create multiple tickets
-        for i in range(2):
-            SupportService.create_ticket(
-                customer_id=test_customer.id,
-                subject=f'Issue {i}',
-                description=f'Description for issue {i}'
-            )
+        bulk_create_tickets(test_customer.id, 2)
         
         result = SupportService.get_customer_tickets(test_customer.id, limit=10)
         
         assert result['total_count'] == 2
         assert len(result['tickets']) == 2
     
-    def test_get_customer_tickets_not_found(self, app_context):
+    def test_get_customer_tickets_not_found(self):
         """Test getting tickets for non-existent customer."""
-        with pytest.raises(ValueError, match='Customer not found'):
+        with pytest.raises(ValueError, match=CUSTOMER_NOT_FOUND_RE):
             SupportService.get_customer_tickets(999)
     
-    def test_update_ticket_status_success(self, app_context, test_customer, test_agent):
+    def test_update_ticket_status_success(self, test_agent, base_ticket):
         """Test successful ticket status update."""
-        ticket_result = SupportService.create_ticket(
-            customer_id=test_customer.id,
-            subject='Account Issue',
-            description='I cannot access my account'
-        )
-        
         result = SupportService.update_ticket_status(
-            ticket_id=ticket_result['ticket_id'],
+            ticket_id=base_ticket['ticket_id'],
             new_status='in_progress',
             agent_id=test_agent.id
         )
@@ -161,40 +180,28 @@ class TestSupportService:
         assert result['success'] is True
         assert result['status'] == 'in_progress'
     
-    def test_update_ticket_status_invalid_status(self, app_context, test_customer, test_agent):
+    def test_update_ticket_status_invalid_status(self, test_agent, base_ticket):
         """Test ticket status update with invalid status."""
-        ticket_result = SupportService.create_ticket(
-            customer_id=test_customer.id,
-            subject='Account Issue',
-            description='I cannot access my account'
-        )
-        
-        with pytest.raises(ValueError, match='Invalid status'):
+        with pytest.raises(ValueError, match=INVALID_STATUS_RE):
             SupportService.update_ticket_status(
-                ticket_id=ticket_result['ticket_id'],
+                ticket_id=base_ticket['ticket_id'],
                 new_status='invalid',
                 agent_id=test_agent.id
             )
     
-    def test_update_ticket_status_not_found(self, app_context, test_agent):
+    def test_update_ticket_status_not_found(self, test_agent_id):
         """Test ticket status update for non-existent ticket."""
-        with pytest.raises(ValueError, match='Ticket not found'):
+        with pytest.raises(ValueError, match=TICKET_NOT_FOUND_RE):
             SupportService.update_ticket_status(
                 ticket_id='invalid-id',
                 new_status='resolved',
-                agent_id=test_agent.id
+                agent_id=test_agent_id
             )
     
-    def test_add_note_success(self, app_context, test_customer, test_agent):
+    def test_add_note_success(self, test_agent, base_ticket):
         """Test successful note addition."""
-        ticket_result = SupportService.create_ticket(
-            customer_id=test_customer.id,
-            subject='Account Issue',
-            description='I cannot access my account'
-        )
-        
         result = SupportService.add_note(
-            ticket_id=ticket_result['ticket_id'],
+            ticket_id=base_ticket['ticket_id'],
             user_id=test_agent.id,
             note='We are investigating this issue'
         )
@@ -202,118 +209,64 @@ class TestSupportService:
         assert result['success'] is True
         assert result['note'] == 'We are investigating this issue'
     
-    def test_add_note_empty(self, app_context, test_customer, test_agent):
+    def test_add_note_empty(self, test_agent, base_ticket):
         """Test adding empty note."""
-        ticket_result = SupportService.create_ticket(
-            customer_id=test_customer.id,
-            subject='Account Issue',
-            description='I cannot access my account'
-        )
-        
-        with pytest.raises(ValueError, match='Note cannot be empty'):
+        with pytest.raises(ValueError, match=EMPTY_NOTE_RE):
             SupportService.add_note(
-                ticket_id=ticket_result['ticket_id'],
+                ticket_id=base_ticket['ticket_id'],
                 user_id=test_agent.id,
                 note=''
             )
     
-    def test_add_note_user_not_found(self, app_context, test_customer):
+    def test_add_note_user_not_found(self, base_ticket):
         """Test adding note with non-existent user."""
-        ticket_result = SupportService.create_ticket(
-            customer_id=test_customer.id,
-            subject='Account Issue',
-            description='I cannot access my account'
-        )
-        
-        with pytest.raises(ValueError, match='User not found'):
+        with pytest.raises(ValueError, match=USER_NOT_FOUND_RE):
             SupportService.add_note(
-                ticket_id=ticket_result['ticket_id'],
+                ticket_id=base_ticket['ticket_id'],
                 user_id=999,
                 note='Test note'
             )
     
-    def test_add_note_ticket_not_found(self, app_context, test_agent):
+    def test_add_note_ticket_not_found(self, test_agent_id):
         """Test adding note to non-existent ticket."""
-        with pytest.raises(ValueError, match='Ticket not found'):
+        with pytest.raises(ValueError, match=TICKET_NOT_FOUND_RE):
             SupportService.add_note(
                 ticket_id='invalid-id',
-                user_id=test_agent.id,
+                user_id=test_agent_id,
                 note='Test note'
             )
     
-    def test_assign_ticket_success(self, app_context, test_customer, test_agent):
+    def test_assign_ticket_success(self, test_agent, test_admin_id, base_ticket):
         """Test successful ticket assignment."""
-        ticket_result = SupportService.create_ticket(
-            customer_id=test_customer.id,
-            subject='Account Issue',
-            description='I cannot access my account'
-        )
-        
-        # Create admin user
-        admin_result = AuthService.register_user(
-            username='admin',
-            email='admin@example.com',
-            phone='+1234567890',
-            password='SecurePass123',
-            full_name='Admin'
-        )
-        admin = User.query.get(admin_result['user_id'])
-        admin.role = UserRole.ADMIN
-        db.session.commit()
-        
         result = SupportService.assign_ticket(
-            ticket_id=ticket_result['ticket_id'],
+            ticket_id=base_ticket['ticket_id'],
             agent_id=test_agent.id,
-            admin_id=admin.id
+            admin_id=test_admin_id
         )
         
         assert result['success'] is True
         assert result['assigned_agent_id'] == test_agent.id
     
-    def test_assign_ticket_invalid_agent(self, app_context, test_customer):
+    def test_assign_ticket_invalid_agent(self, test_customer, test_admin_id, base_ticket):
         """Test ticket assignment to non-support agent."""
-        ticket_result = SupportService.create_ticket(
-            customer_id=test_customer.id,
-            subject='Account Issue',
-            description='I cannot access my account'
-        )
-        
-        # Create admin user
-        admin_result = AuthService.register_user(
-            username='admin',
-            email='admin@example.com',
-            phone='+1234567890',
-            password='SecurePass123',
-            full_name='Admin'
-        )
-        admin = User.query.get(admin_result['user_id'])
-        admin.role = UserRole.ADMIN
-        db.session.commit()
-        
         # Try to assign to customer (not support agent)
-        with pytest.raises(ValueError, match='Invalid support agent'):
+        with pytest.raises(ValueError, match=INVALID_AGENT_RE):
             SupportService.assign_ticket(
-                ticket_id=ticket_result['ticket_id'],
+                ticket_id=base_ticket['ticket_id'],
                 agent_id=test_customer.id,
-                admin_id=admin.id
+                admin_id=test_admin_id
             )
     
-    def test_ticket_with_multiple_notes(self, app_context, test_customer, test_agent):
+    def test_ticket_with_multiple_notes(self, test_agent, base_ticket):
         """Test ticket with multiple notes."""
-        ticket_result = SupportService.create_ticket(
-            customer_id=test_customer.id,
-            subject='Account Issue',
-            description='I cannot access my account'
-        )
-        
         # Add multiple notes
-        for i in range(3):
-            SupportService.add_note(
-                ticket_id=ticket_result['ticket_id'],
-                user_id=test_agent.id,
-                note=f'Note {i}'
-            )
+        ticket = SupportTicket.query.filter_by(ticket_id=base_ticket['ticket_id']).first()
+        db.session.bulk_insert_mappings(TicketNote, [
+            {'ticket_id': ticket.id, 'author_id': test_agent.id, 'content': f'Note {i}'}
+            for i in range(3)
+        ])
+        db.session.commit()
         
-        result = SupportService.get_ticket(ticket_result['ticket_id'])
+        result = SupportService.get_ticket(base_ticket['ticket_id'])
         
         assert len(result['notes']) == 3
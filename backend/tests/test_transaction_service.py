@@ -1,31 +1,25 @@
+import re
 import pytest
 from datetime import datetime, timedelta
-from app import create_app
-from app.models import db, User, Account, Transaction, AccountStatus
+from decimal import Decimal
+from sqlalchemy import update
+from app.models import db, User, Account, Transaction, TransactionType, AccountStatus
 from app.auth_service import AuthService
 from app.account_service import AccountService
 from app.transaction_service import TransactionService
 
-@pytest.fixture
-def app():
-    """Create application for testing."""
-    app = create_app('testing')
-    
-    with app.app_context():
-        db.create_all()
-        yield app
-        db.session.remove()
-        db.drop_all()
+INSUFFICIENT_BALANCE_RE = re.compile(r'Insufficient balance')
+NON_POSITIVE_AMOUNT_RE = re.compile(r'Transfer amount must be positive')
+SENDER_INACTIVE_RE = re.compile(r'Sender account is not active')
+RECEIVER_INACTIVE_RE = re.compile(r'Receiver account is not active')
+RECEIVER_NOT_FOUND_RE = re.compile(r'Receiver account not found')
+TRANSACTION_NOT_FOUND_RE = re.compile(r'Transaction not found')
 
-@pytest.fixture
-def app_context(app):
-    """Create application context."""
-    with app.app_context():
-        yield
+pytestmark = pytest.mark.usefixtures('module_fast_hash', 'db_session')
 
-@pytest.fixture
-def test_user(app_context):
-    """Create a test user."""
+@pytest.fixture(scope='module')
+def test_user_id(db_connection):
+    """Register the test user once per module."""
     result = AuthService.register_user(
         username='testuser',
         email='test@example.com',
@@ -33,11 +27,11 @@ def test_user(app_context):
         password='SecurePass123',
         full_name='Test User'
     )
-    return User.query.get(result['user_id'])
+    return result['user_id']
 
-@pytest.fixture
-def test_user2(app_context):
-    """Create a second test user."""
+@pytest.fixture(scope='module')
+def test_user2_id(db_connection):
+    """Register the second test user once per module."""
     result = AuthService.register_user(
         username='testuser2',
         email='test2@example.com',
@@ -45,19 +39,29 @@ def test_user2(app_context):
         password='SecurePass123',
         full_name='Test User 2'
     )
-    return User.query.get(result['user_id'])
+    return result['user_id']
+
+@pytest.fixture
+def test_user(db_session, test_user_id):
+    """Load the shared test user."""
+    return db.session.get(User, test_user_id)
 
 @pytest.fixture
-def test_accounts(app_context, test_user):
-    """Create test accounts."""
+def test_user2(db_session, test_user2_id):
+    """Load the shared second test user."""
+    return db.session.get(User, test_user2_id)
+
+@pytest.fixture(scope='class')
+def test_accounts(db_connection, test_user_id):
+    """Create the checking/savings pair once per class; tests roll back their changes."""
     account1 = AccountService.create_account(
-        user_id=test_user.id,
+        user_id=test_user_id,
         account_type='checking',
         opening_balance=1000.0
     )
     
     account2 = AccountService.create_account(
-        user_id=test_user.id,
+        user_id=test_user_id,
         account_type='savings',
         opening_balance=5000.0
     )
@@ -70,7 +74,7 @@ def test_accounts(app_context, test_user):
 class TestTransactionService:
     """Test cases for TransactionService."""
     
-    def test_internal_transfer_success(self, app_context, test_user, test_accounts):
+    def test_internal_transfer_success(self, test_user, test_accounts):
         """Test successful internal transfer."""
         result = TransactionService.internal_transfer(
             sender_user_id=test_user.id,
@@ -84,67 +88,123 @@ class TestTransactionService:
         assert result['amount'] == 500.0
         
         # Verify balances
-        account1 = Account.query.get(test_accounts['account1_id'])
-        account2 = Account.query.get(test_accounts['account2_id'])
+        account1 = db.session.get(Account, test_accounts['account1_id'])
+        account2 = db.session.get(Account, test_accounts['account2_id'])
         
         assert account1.balance == 500.0
         assert account2.balance == 5500.0
     
-    def test_internal_transfer_insufficient_balance(self, app_context, test_user, test_accounts):
-        """Test internal transfer with insufficient balance."""
-        with pytest.raises(ValueError, match='Insufficient balance'):
-            TransactionService.internal_transfer(
-                sender_user_id=test_user.id,
-                sender_account_id=test_accounts['account1_id'],
-                receiver_account_id=test_accounts['account2_id'],
-                amount=2000.0
-            )
+    def test_accounts_survive_rolled_back_transfer(self, db_connection, test_user_id, test_accounts):
+        """Test that rolling back a test's savepoint restores the shared accounts."""
+        db.session.remove()
+        savepoint = db_connection.begin_nested()
+        TransactionService.internal_transfer(
+            sender_user_id=test_user_id,
+            sender_account_id=test_accounts['account1_id'],
+            receiver_account_id=test_accounts['account2_id'],
+            amount=500.0
+        )
+        db.session.remove()
+        savepoint.rollback()
+        
+        account1 = db.session.get(Account, test_accounts['account1_id'])
+        account2 = db.session.get(Account, test_accounts['account2_id'])
+        
+        assert account1.balance == Decimal('1000.00')
+        assert account2.balance == Decimal('5000.00')
+        assert Transaction.query.count() == 0
     
-    def test_internal_transfer_negative_amount(self, app_context, test_user, test_accounts):
-        """Test internal transfer with negative amount."""
-        with pytest.raises(ValueError, match='Transfer amount must be positive'):
+    @pytest.mark.parametrize('amount, frozen, message', [
+        (2000.0, None, INSUFFICIENT_BALANCE_RE),
+        (-100.0, None, NON_POSITIVE_AMOUNT_RE),
+        (0.0, None, NON_POSITIVE_AMOUNT_RE),
+        (100.0, 'account1_id', SENDER_INACTIVE_RE),
+        (100.0, 'account2_id', RECEIVER_INACTIVE_RE),
+    ], ids=['insufficient', 'negative', 'zero', 'frozen_sender', 'frozen_receiver'])
+    def test_internal_transfer_rejected(self, test_user, test_accounts, amount, frozen, message):
+        """Test internal transfers that fail validation."""
+        if frozen:
+            AccountService.freeze_account(test_accounts[frozen], test_user.id)
+        
+        with pytest.raises(ValueError, match=message):
             TransactionService.internal_transfer(
                 sender_user_id=test_user.id,
                 sender_account_id=test_accounts['account1_id'],
                 receiver_account_id=test_accounts['account2_id'],
-                amount=-100.0
+                amount=amount
             )
     
-    def test_internal_transfer_zero_amount(self, app_context, test_user, test_accounts):
-        """Test internal transfer with zero amount."""
-        with pytest.raises(ValueError, match='Transfer amount must be positive'):
-            TransactionService.internal_transfer(
+    def test_bulk_internal_transfer_success(self, test_user, test_accounts):
+        """Test several internal transfers committed together."""
+        result = TransactionService.bulk_internal_transfer(
+            sender_user_id=test_user.id,
+            sender_account_id=test_accounts['account1_id'],
+            receiver_account_id=test_accounts['account2_id'],
+            amounts=[100.0, 200.0, 50.25]
+        )
+        
+        assert result['success'] is True
+        assert result['count'] == 3
+        assert result['total_amount'] == 350.25
+        
+        account1 = db.session.get(Account, test_accounts['account1_id'])
+        account2 = db.session.get(Account, test_accounts['account2_id'])
+        
+        assert account1.balance == Decimal('649.75')
+        assert account2.balance == Decimal('5350.25')
+        assert Transaction.query.count() == 6
+    
+    def test_bulk_internal_transfer_insufficient_balance(self, test_user, test_accounts):
+        """Test that a batch exceeding the balance transfers nothing."""
+        with pytest.raises(ValueError, match=INSUFFICIENT_BALANCE_RE):
+            TransactionService.bulk_internal_transfer(
                 sender_user_id=test_user.id,
                 sender_account_id=test_accounts['account1_id'],
                 receiver_account_id=test_accounts['account2_id'],
-                amount=0.0
+                amounts=[600.0, 600.0]
             )
+        
+        assert Transaction.query.count() == 0
     
-    def test_internal_transfer_frozen_sender_account(self, app_context, test_user, test_accounts):
-        """Test internal transfer from frozen account."""
-        AccountService.freeze_account(test_accounts['account1_id'], test_user.id)
+    def test_internal_transfer_rechecks_balance_on_write(self, test_user, test_accounts):
+        """Test that a transfer fails if the balance drops after validation read it."""
+        sender = db.session.get(Account, test_accounts['account1_id'])
+        
+        # Another transaction spends most of the balance behind the loaded copy
+        db.session.execute(
+            update(Account.__table__)
+            .where(Account.__table__.c.id == sender.id)
+            .values(balance=Decimal('100.00'))
+        )
         
-        with pytest.raises(ValueError, match='Sender account is not active'):
+        with pytest.raises(ValueError, match=INSUFFICIENT_BALANCE_RE):
             TransactionService.internal_transfer(
                 sender_user_id=test_user.id,
-                sender_account_id=test_accounts['account1_id'],
+                sender_account_id=sender.id,
                 receiver_account_id=test_accounts['account2_id'],
-                amount=100.0
+                amount=500.0
             )
     
-    def test_internal_transfer_frozen_receiver_account(self, app_context, test_user, test_accounts):
-        """Test internal transfer to frozen account."""
-        AccountService.freeze_account(test_accounts['account2_id'], test_user.id)
+    def test_bulk_internal_transfer_rechecks_balance_on_write(self, test_user, test_accounts):
+        """Test that a bulk transfer fails if the balance drops after validation read it."""
+        sender = db.session.get(Account, test_accounts['account1_id'])
         
-        with pytest.raises(ValueError, match='Receiver account is not active'):
-            TransactionService.internal_transfer(
+        # Another transaction spends most of the balance behind the loaded copy
+        db.session.execute(
+            update(Account.__table__)
+            .where(Account.__table__.c.id == sender.id)
+            .values(balance=Decimal('100.00'))
+        )
+        
+        with pytest.raises(ValueError, match=INSUFFICIENT_BALANCE_RE):
+            TransactionService.bulk_internal_transfer(
                 sender_user_id=test_user.id,
-                sender_account_id=test_accounts['account1_id'],
+                sender_account_id=sender.id,
                 receiver_account_id=test_accounts['account2_id'],
-                amount=100.0
+                amounts=[100.0, 100.0]
             )
     
-    def test_external_transfer_success(self, app_context, test_user, test_user2, test_accounts):
+    def test_external_transfer_success(self, test_user, test_user2, test_accounts):
         """Test successful external transfer."""
         # Create account for second user
         account2_user2 = AccountService.create_account(
@@ -153,7 +213,7 @@ class TestTransactionService:
             opening_balance=0.0
         )
         
-        account2_obj = Account.query.get(account2_user2['account_id'])
+        account2_obj = db.session.get(Account, account2_user2['account_id'])
         
         result = TransactionService.external_transfer(
             sender_user_id=test_user.id,
@@ -167,13 +227,13 @@ class TestTransactionService:
         assert result['amount'] == 300.0
         
         # Verify balances
-        account1 = Account.query.get(test_accounts['account1_id'])
+        account1 = db.session.get(Account, test_accounts['account1_id'])
         assert account1.balance == 700.0
         assert account2_obj.balance == 300.0
     
-    def test_external_transfer_invalid_receiver(self, app_context, test_user, test_accounts):
+    def test_external_transfer_invalid_receiver(self, test_user, test_accounts):
         """Test external transfer to non-existent account."""
-        with pytest.raises(ValueError, match='Receiver account not found'):
+        with pytest.raises(ValueError, match=RECEIVER_NOT_FOUND_RE):
             TransactionService.external_transfer(
                 sender_user_id=test_user.id,
                 sender_account_id=test_accounts['account1_id'],
@@ -181,7 +241,7 @@ class TestTransactionService:
                 amount=100.0
             )
     
-    def test_external_transfer_insufficient_balance(self, app_context, test_user, test_user2, test_accounts):
+    def test_external_transfer_insufficient_balance(self, test_user, test_user2, test_accounts):
         """Test external transfer with insufficient balance."""
         account2_user2 = AccountService.create_account(
             user_id=test_user2.id,
@@ -189,9 +249,9 @@ class TestTransactionService:
             opening_balance=0.0
         )
         
-        account2_obj = Account.query.get(account2_user2['account_id'])
+        account2_obj = db.session.get(Account, account2_user2['account_id'])
         
-        with pytest.raises(ValueError, match='Insufficient balance'):
+        with pytest.raises(ValueError, match=INSUFFICIENT_BALANCE_RE):
             TransactionService.external_transfer(
                 sender_user_id=test_user.id,
                 sender_account_id=test_accounts['account1_id'],
@@ -199,7 +259,7 @@ class TestTransactionService:
                 amount=2000.0
             )
     
-    def test_get_transaction_success(self, app_context, test_user, test_accounts):
+    def test_get_transaction_success(self, test_user, test_accounts):
         """Test getting transaction details."""
         transfer_result = TransactionService.internal_transfer(
             sender_user_id=test_user.id,
@@ -213,21 +273,25 @@ class TestTransactionService:
         assert result['amount'] == 200.0
         assert result['transaction_type'] == 'debit'
     
-    def test_get_transaction_not_found(self, app_context):
+    def test_get_transaction_not_found(self):
         """Test getting non-existent transaction."""
-        with pytest.raises(ValueError, match='Transaction not found'):
+        with pytest.raises(ValueError, match=TRANSACTION_NOT_FOUND_RE):
             TransactionService.get_transaction('invalid-id')
     
-    def test_get_account_transactions(self, app_context, test_user, test_accounts):
+    def test_get_account_transactions(self, test_user, test_accounts):
         """Test getting account transaction history."""
-        # Create multiple transactions
-        for i in range(3):
-            TransactionService.internal_transfer(
-                sender_user_id=test_user.id,
-                sender_account_id=test_accounts['account1_id'],
-                receiver_account_id=test_accounts['account2_id'],
-                amount=100.0
-            )
+        # Create multiple transactions; only the history query is under test
+        db.session.bulk_insert_mappings(Transaction, [
+            {
+                'sender_id': test_user.id,
+                'sender_account_id': test_accounts['account1_id'],
+                'receiver_account_id': test_accounts['account2_id'],
+                'amount': Decimal('100.00'),
+                'transaction_type': TransactionType.DEBIT
+            }
+            for _ in range(3)
+        ])
+        db.session.commit()
         
         result = TransactionService.get_account_transactions(
             test_accounts['account1_id'],
@@ -237,7 +301,7 @@ class TestTransactionService:
         assert result['total_count'] == 3
         assert len(result['transactions']) == 3
     
-    def test_filter_transactions_by_date(self, app_context, test_user, test_accounts):
+    def test_filter_transactions_by_date(self, test_user, test_accounts):
         """Test filtering transactions by date range."""
         # Create a transaction
         TransactionService.internal_transfer(
@@ -259,21 +323,14 @@ class TestTransactionService:
         
         assert result['total_count'] == 1
     
-    def test_filter_transactions_by_amount(self, app_context, test_user, test_accounts):
+    def test_filter_transactions_by_amount(self, test_user, test_accounts):
         """Test filtering transactions by amount range."""
-        # Create transactions with different amounts
-        TransactionService.internal_transfer(
+        # Create transactions with different amounts in a single commit
+        TransactionService.bulk_internal_transfer(
             sender_user_id=test_user.id,
             sender_account_id=test_accounts['account1_id'],
             receiver_account_id=test_accounts['account2_id'],
-            amount=100.0
-        )
-        
-        TransactionService.internal_transfer(
-            sender_user_id=test_user.id,
-            sender_account_id=test_accounts['account1_id'],
-            receiver_account_id=test_accounts['account2_id'],
-            amount=500.0
+            amounts=[100.0, 500.0]
         )
         
         # Filter by amount range
@@ -286,7 +343,7 @@ class TestTransactionService:
         assert result['total_count'] == 1
         assert result['transactions'][0]['amount'] == 500.0
     
-    def test_filter_transactions_by_type(self, app_context, test_user, test_accounts):
+    def test_filter_transactions_by_type(self, test_user, test_accounts):
         """Test filtering transactions by type."""
         TransactionService.internal_transfer(
             sender_user_id=test_user.id,